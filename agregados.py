@@ -0,0 +1,256 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from indices import IndiceAsesores
+
+COLUMNAS_CUBO = ['sesiones', 'duracion_total', 'duracion_n', 'puntaje_suma', 'puntaje_n']
+
+# Niveles de agregación disponibles: día, semana (inicia el lunes) y mes
+FRECUENCIAS = {'D': 'Día', 'W': 'Semana', 'M': 'Mes'}
+
+# Mandamientos evaluados en cada sesión
+TOTAL_MANDAMIENTOS = 6
+
+
+class CuboSesiones:
+    # Agregados por (asesor, fecha) calculados una sola vez por versión de datos.
+    # Cada nivel se guarda con su propio IndiceAsesores, de modo que las métricas
+    # y los gráficos de un asesor salen de unas pocas filas ya sumadas.
+
+    def __init__(self, df, col_asesor='Asesor Evaluado', col_fecha='Fecha de Capa'):
+        self.col_asesor = col_asesor
+        self.col_fecha = col_fecha
+        base = self._contribuciones(df)
+        self.niveles = {
+            frecuencia: IndiceAsesores(self._agregar(base, frecuencia), col_asesor, col_fecha)
+            for frecuencia in FRECUENCIAS
+        }
+
+    def _contribuciones(self, df, signo=1):
+        # Una fila por sesión con lo que aporta a cada celda del cubo; con signo
+        # -1 resta el aporte de las sesiones que se reemplazan
+        duracion = df['Duración de Capa']
+        puntaje = df['Puntaje Promedio']
+        return pd.DataFrame({
+            self.col_asesor: df[self.col_asesor],
+            self.col_fecha: df[self.col_fecha].dt.normalize(),
+            'sesiones': np.full(len(df), signo, dtype='int64'),
+            'duracion_total': duracion.fillna(0) * signo,
+            'duracion_n': duracion.notna().astype('int64') * signo,
+            'puntaje_suma': puntaje.fillna(0) * signo,
+            'puntaje_n': puntaje.notna().astype('int64') * signo,
+        })
+
+    def _agregar(self, base, frecuencia):
+        if frecuencia != 'D':
+            base = base.assign(**{self.col_fecha: base[self.col_fecha].dt.to_period(frecuencia).dt.start_time})
+        return self._sumar_celdas(base)
+
+    def _sumar_celdas(self, filas):
+        return filas.groupby(
+            [self.col_asesor, self.col_fecha], dropna=False, observed=True, sort=False
+        )[COLUMNAS_CUBO].sum().reset_index()
+
+    def con_cambios(self, quitadas, agregadas):
+        # Suma a las celdas existentes el aporte de las sesiones nuevas y resta el
+        # de las reemplazadas: el trabajo depende del tamaño del cambio y del cubo,
+        # no de la cantidad total de sesiones
+        delta = pd.concat([self._contribuciones(quitadas, -1), self._contribuciones(agregadas)], ignore_index=True)
+        nuevo = CuboSesiones.__new__(CuboSesiones)
+        nuevo.col_asesor = self.col_asesor
+        nuevo.col_fecha = self.col_fecha
+        nuevo.niveles = {}
+        for frecuencia, nivel in self.niveles.items():
+            celdas = self._sumar_celdas(pd.concat([nivel.tabla, self._agregar(delta, frecuencia)], ignore_index=True))
+            celdas = celdas[celdas['sesiones'] > 0]
+            nuevo.niveles[frecuencia] = IndiceAsesores(celdas, self.col_asesor, self.col_fecha)
+        return nuevo
+
+    def resumen(self, asesor, desde=None, hasta=None):
+        totales = self.niveles['D'].sesiones(asesor, desde, hasta)[COLUMNAS_CUBO].sum()
+        duracion_n = totales['duracion_n']
+        puntaje_n = totales['puntaje_n']
+        return {
+            'sesiones': int(totales['sesiones']),
+            'duracion_total': float(totales['duracion_total']),
+            'duracion_media': totales['duracion_total'] / duracion_n if duracion_n else np.nan,
+            'puntaje_medio': totales['puntaje_suma'] / puntaje_n if puntaje_n else np.nan,
+        }
+
+    def serie(self, asesor, frecuencia='D', desde=None, hasta=None):
+        # Filas del cubo con fecha conocida, listas para graficar
+        filas = self.niveles[frecuencia].sesiones(asesor, desde, hasta)
+        return filas[filas[self.col_fecha].notna()]
+
+
+def resumen_por_asesor(df, columnas_criterio, no_cumplidos=None, col_asesor='Asesor Evaluado'):
+    # Una fila por asesor con todas las métricas, en un solo groupby sobre el
+    # dataset completo. no_cumplidos: mandamientos no cumplidos por asesor
+    # (suma de MatrizMandamientos.por_asesor); sin él, el cumplimiento queda vacío
+    agregaciones = {
+        'sesiones': ('Fecha de Capa', 'size'),
+        'duracion_total': ('Duración de Capa', 'sum'),
+        'duracion_media': ('Duración de Capa', 'mean'),
+        'puntaje_medio': ('Puntaje Promedio', 'mean'),
+    }
+    for columna in columnas_criterio:
+        agregaciones[columna] = (columna, 'mean')
+    tabla = df.groupby(col_asesor, observed=True, sort=True).agg(**agregaciones)
+    tabla[columnas_criterio] = tabla[columnas_criterio].astype('float64')
+    if no_cumplidos is not None:
+        posibles = tabla['sesiones'] * TOTAL_MANDAMIENTOS
+        tabla['cumplimiento'] = ((1 - no_cumplidos.reindex(tabla.index).to_numpy() / posibles) * 100).clip(lower=0)
+    else:
+        tabla['cumplimiento'] = np.nan
+    return tabla.reset_index()
+
+
+# Ventanas de las tendencias móviles: las últimas N sesiones o los últimos N días
+UNIDADES_VENTANA = {'sesiones': 'Sesiones', 'dias': 'Días'}
+POR_UNIDAD = {'sesiones': 'por sesión', 'dias': 'por día'}
+
+# Pendiente (puntos por sesión o por día) a partir de la cual una tendencia se
+# considera en alza o en baja
+UMBRAL_PENDIENTE = {'sesiones': 0.02, 'dias': 0.005}
+
+ESTADOS_TENDENCIA = {1: '↗ Mejorando', 0: '→ Estable', -1: '↘ Empeorando'}
+
+# Tendencias guardadas por conjunto de datos. Cada una ocupa dos matrices
+# filas x columnas en float64 (unos 96 MB por millón de sesiones) y los
+# controles permiten más de cien ventanas distintas
+MAX_TENDENCIAS = 4
+
+
+class TendenciasAsesores:
+    # Media y pendiente (mínimos cuadrados) móviles de varias columnas, para
+    # todos los asesores a la vez. 'tabla' está ordenada por asesor y fecha y
+    # 'rangos' da el rango contiguo de filas de cada asesor (IndiceAsesores).
+    # Las sumas de cada ventana salen de restar sumas acumuladas, así que el
+    # costo no depende del tamaño de la ventana ni de la cantidad de asesores
+
+    def __init__(self, tabla, rangos, columnas, ventana, unidad='sesiones', col_fecha='Fecha de Capa'):
+        self.columnas = list(columnas)
+        self.ventana = int(ventana)
+        self.unidad = unidad
+        self.col_fecha = col_fecha
+        self.asesores = list(rangos)
+        self.fechas = tabla[col_fecha]
+        self._inicios = np.array([inicio for inicio, _ in rangos.values()], dtype='int64')
+        largos = np.array([fin - inicio for inicio, fin in rangos.values()], dtype='int64')
+        # Las filas sin asesor quedan al final de la tabla y no tienen tendencia
+        m = int(largos.sum())
+        inicio_grupo = np.repeat(self._inicios, largos)
+        fila = np.arange(m)
+
+        if unidad == 'dias':
+            fechas = self.fechas.iloc[:m]
+            dias = (fechas - fechas.min()).dt.days.to_numpy(dtype='float64', na_value=np.nan)
+            x_valido = ~np.isnan(dias)
+            # Clave creciente (asesor, día) para buscar dónde empieza la ventana
+            # de cada fila; las fechas nulas van al final de su asesor
+            tramo = (np.nanmax(dias) if x_valido.any() else 0) + self.ventana + 2
+            grupo = np.repeat(np.arange(len(largos)), largos)
+            clave = grupo * tramo + np.where(x_valido, dias, tramo - 1)
+            comienzo = np.searchsorted(clave, clave - (self.ventana - 1), side='left')
+            # Días desde la primera sesión del asesor
+            x = np.where(x_valido, dias - np.nan_to_num(dias[inicio_grupo]), 0.0)
+        else:
+            x_valido = np.ones(m, dtype=bool)
+            comienzo = fila - self.ventana + 1
+            x = (fila - inicio_grupo).astype('float64')
+        comienzo = np.maximum(comienzo, inicio_grupo)
+
+        self.medias = np.full((len(tabla), len(self.columnas)), np.nan)
+        self.pendientes = np.full((len(tabla), len(self.columnas)), np.nan)
+        for k, columna in enumerate(self.columnas):
+            y = tabla[columna].iloc[:m].to_numpy(dtype='float64', na_value=np.nan)
+            peso = ~np.isnan(y) & x_valido
+            y = np.where(peso, y, 0.0)
+            xp = np.where(peso, x, 0.0)
+            acumuladas = np.zeros((m + 1, 5))
+            np.cumsum(np.column_stack([peso, y, xp, xp * xp, xp * y]), axis=0, out=acumuladas[1:])
+            n, sy, sx, sxx, sxy = (acumuladas[fila + 1] - acumuladas[comienzo]).T
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.medias[:m, k] = np.where(n > 0, sy / n, np.nan)
+                denominador = n * sxx - sx * sx
+                definida = (n >= 2) & (denominador > 1e-9 * np.maximum(n * sxx, 1))
+                self.pendientes[:m, k] = np.where(definida, (n * sxy - sx * sy) / denominador, np.nan)
+
+    def serie(self, inicio=0, fin=None):
+        # Filas [inicio, fin) (ver IndiceAsesores.rango) con la fecha, la media
+        # móvil de cada columna y su pendiente en '<columna> (pendiente)'
+        fin = len(self.fechas) if fin is None else fin
+        datos = {self.col_fecha: self.fechas.iloc[inicio:fin].to_numpy()}
+        for k, columna in enumerate(self.columnas):
+            datos[columna] = self.medias[inicio:fin, k]
+            datos[f"{columna} (pendiente)"] = self.pendientes[inicio:fin, k]
+        return pd.DataFrame(datos, index=pd.RangeIndex(inicio, fin))
+
+    def ultima(self, columna, inicio=0, fin=None):
+        # Media, pendiente y estado de la última fila de [inicio, fin) con
+        # pendiente, por ejemplo la de un asesor en el rango de fechas elegido
+        k = self.columnas.index(columna)
+        fin = len(self.fechas) if fin is None else fin
+        validas = np.flatnonzero(~np.isnan(self.pendientes[inicio:fin, k]))
+        if len(validas) == 0:
+            return {'media': np.nan, 'pendiente': np.nan, 'estado': None}
+        fila = inicio + validas[-1]
+        pendiente = self.pendientes[fila, k]
+        return {'media': self.medias[fila, k], 'pendiente': pendiente, 'estado': estado_tendencia(pendiente, self.unidad)}
+
+    def indicadores(self, columna):
+        # Por asesor, la media y la pendiente de la última ventana con datos y
+        # si la columna está mejorando, estable o empeorando
+        k = self.columnas.index(columna)
+        if not self.asesores:
+            return pd.DataFrame(columns=['media', 'pendiente', 'estado'])
+        fila = np.arange(len(self.fechas))
+        validas = np.where(~np.isnan(self.medias[:, k]), fila, -1)
+        ultima = np.maximum.reduceat(validas, self._inicios)
+        con_datos = ultima >= self._inicios
+        ultima = np.where(con_datos, ultima, 0)
+        pendiente = np.where(con_datos, self.pendientes[ultima, k], np.nan)
+        return pd.DataFrame({
+            'media': np.where(con_datos, self.medias[ultima, k], np.nan),
+            'pendiente': pendiente,
+            'estado': estado_tendencia(pendiente, self.unidad),
+        }, index=pd.Index(self.asesores, name='Asesor Evaluado'))
+
+
+class CacheTendencias:
+    # LRU de TendenciasAsesores por (ventana, unidad), compartida por las
+    # sesiones que usan el mismo conjunto. Como en CacheFiguras, se construye
+    # fuera del lock
+
+    def __init__(self, maximo=MAX_TENDENCIAS):
+        self.maximo = maximo
+        self._tendencias = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            tendencias = self._tendencias.get(clave)
+            if tendencias is not None:
+                self._tendencias.move_to_end(clave)
+                return tendencias
+        tendencias = construir()
+        with self._lock:
+            self._tendencias[clave] = tendencias
+            self._tendencias.move_to_end(clave)
+            while len(self._tendencias) > self.maximo:
+                self._tendencias.popitem(last=False)
+        return tendencias
+
+
+def estado_tendencia(pendiente, unidad='sesiones'):
+    # Etiqueta de ESTADOS_TENDENCIA para una pendiente o un arreglo de pendientes;
+    # sin pendiente (menos de dos puntos en la ventana) queda vacía
+    pendiente = np.asarray(pendiente, dtype='float64')
+    umbral = UMBRAL_PENDIENTE[unidad]
+    signo = np.where(pendiente > umbral, 1, np.where(pendiente < -umbral, -1, 0))
+    etiquetas = np.array([ESTADOS_TENDENCIA[s] for s in signo.ravel()], dtype=object).reshape(signo.shape)
+    etiquetas = np.where(np.isnan(pendiente), None, etiquetas)
+    return etiquetas if etiquetas.ndim else etiquetas.item()
@@ -0,0 +1,391 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import datos
+from agregados import COLUMNAS_CUBO, TOTAL_MANDAMIENTOS, CacheTendencias, TendenciasAsesores
+from datos import COLUMNA_MANDAMIENTOS, COLUMNAS_EXPERTISE, COLUMNAS_TENDENCIA
+from indices import _unir_filas, intersectar, limites_dias, terminos
+
+# Backend opcional en SQLite (DASHBOARD_BACKEND=sqlite). Las sesiones de cada
+# versión de los datos se guardan una vez en una base con índices junto a la
+# copia columnar; las vistas hacen consultas que devuelven solo las filas o
+# agregados que muestran y el proceso no mantiene el dataset en memoria.
+# Expone la misma interfaz que ConjuntoDatos (indice, cubo, mandamientos,
+# texto, ranking), así que los scripts no cambian.
+
+COL_ASESOR = 'Asesor Evaluado'
+COL_FECHA = 'Fecha de Capa'
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+# Versión de las tablas de la base; una base con otra versión se vuelve a volcar
+ESQUEMA_ALMACEN = 2
+
+# Inicio de cada periodo del cubo, igual que to_period(...).start_time
+PERIODOS = {
+    'D': 'datetime(date({fecha}))',
+    'W': "datetime(date({fecha}, 'weekday 0', '-6 days'))",
+    'M': "datetime(date({fecha}, 'start of month'))",
+}
+
+# Conjunto abierto por ruta y proyección, como datos._conjuntos
+_almacenes = {}
+_lock_almacenes = threading.Lock()
+
+
+def _q(nombre):
+    # Identificador entre comillas: las columnas del Excel tienen espacios y signos
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _ruta_almacen(ruta, columnas):
+    _, ruta_arrow, _ = datos._rutas_cache(ruta, columnas)
+    return os.path.splitext(ruta_arrow)[0] + '.sqlite'
+
+
+def _a_sql(df):
+    # Tipos que sqlite3 acepta: fechas como texto ordenable, categorías como
+    # texto y cualquier otro objeto (horas, por ejemplo) como str
+    salida = pd.DataFrame(index=df.index)
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            salida[columna] = serie.dt.strftime(FORMATO_FECHA).astype(object).where(serie.notna(), None)
+        elif isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(serie):
+            salida[columna] = serie.astype(object).where(serie.notna(), None)
+        elif pd.api.types.is_extension_array_dtype(serie):
+            salida[columna] = serie.astype('float64')
+        elif serie.dtype == object:
+            salida[columna] = serie.map(lambda v: v if v is None or isinstance(v, (str, int, float)) else str(v))
+        else:
+            salida[columna] = serie
+    return salida
+
+
+def _volcar(conjunto, ruta_db):
+    df = conjunto.df
+    fechas = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+    filas, columnas = np.nonzero(conjunto.mandamientos._desempaquetar())
+    with closing(sqlite3.connect(ruta_db)) as con:
+        # 'fila' es la posición en la tabla ordenada por asesor y fecha: las
+        # sesiones de un asesor son un rango contiguo, igual que en IndiceAsesores
+        _a_sql(df).assign(fila=np.arange(len(df))).to_sql('sesiones', con, index=False, chunksize=10_000)
+        pd.DataFrame({'fila': filas, 'columna': columnas}).to_sql('mandamientos', con, index=False)
+        pd.DataFrame({
+            'columna': np.arange(len(conjunto.mandamientos.vocabulario)),
+            'mandamiento': conjunto.mandamientos.vocabulario,
+        }).to_sql('vocabulario', con, index=False)
+        # Índice invertido del texto: una fila por término y sesión
+        texto = conjunto.texto
+        pd.DataFrame({
+            'token': np.repeat(texto.vocabulario.astype(object), np.diff(texto.inicios)),
+            'fila': texto.filas,
+            'mascara': texto.mascaras,
+        }).to_sql('texto', con, index=False, chunksize=100_000)
+        con.execute("CREATE UNIQUE INDEX idx_fila ON sesiones (fila)")
+        con.execute(f"CREATE INDEX idx_asesor_fecha ON sesiones ({_q(COL_ASESOR)}, {_q(COL_FECHA)}, fila)")
+        con.execute("CREATE INDEX idx_mandamientos ON mandamientos (fila)")
+        con.execute("CREATE INDEX idx_texto ON texto (token, fila, mascara)")
+        meta = {
+            'esquema': ESQUEMA_ALMACEN,
+            'version': conjunto.version,
+            'columnas_fecha': fechas,
+            'con_mandamientos': COLUMNA_MANDAMIENTOS in df,
+            'columnas_texto': texto.columnas,
+        }
+        con.execute("CREATE TABLE meta (valor TEXT)")
+        con.execute("INSERT INTO meta VALUES (?)", (json.dumps(meta),))
+        con.commit()
+
+
+def _leer_meta(ruta_db):
+    if not os.path.exists(ruta_db):
+        return None
+    try:
+        with closing(sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)) as con:
+            meta = json.loads(con.execute("SELECT valor FROM meta").fetchone()[0])
+    except (sqlite3.Error, TypeError, ValueError):
+        return None
+    return meta if meta.get('esquema') == ESQUEMA_ALMACEN else None
+
+
+class _Consultas:
+    # Una conexión de solo lectura por consulta: las sesiones de Streamlit
+    # corren en hilos distintos y abrir SQLite es barato
+
+    def __init__(self, ruta_db, meta):
+        self.ruta_db = ruta_db
+        self.meta = meta
+
+    def leer(self, sql, parametros=()):
+        with closing(sqlite3.connect(f"file:{self.ruta_db}?mode=ro", uri=True)) as con:
+            df = pd.read_sql_query(sql, con, params=parametros)
+        for columna in self.meta['columnas_fecha']:
+            if columna in df:
+                df[columna] = pd.to_datetime(df[columna], format=FORMATO_FECHA)
+        return df
+
+    def filtro(self, asesor, desde=None, hasta=None, fecha=_q(COL_FECHA)):
+        # 'asesor' puede ser una lista de asesores
+        if isinstance(asesor, (list, tuple)):
+            condiciones = [f"{_q(COL_ASESOR)} IN ({', '.join('?' * len(asesor))})"]
+            parametros = list(asesor)
+        else:
+            condiciones = [f"{_q(COL_ASESOR)} = ?"]
+            parametros = [asesor]
+        # Días completos, como IndiceAsesores.rango
+        desde, hasta = limites_dias(desde, hasta)
+        if desde is not None:
+            condiciones.append(f"{fecha} >= ?")
+            parametros.append(desde.strftime(FORMATO_FECHA))
+        if hasta is not None:
+            condiciones.append(f"{fecha} < ?")
+            parametros.append(hasta.strftime(FORMATO_FECHA))
+        return " AND ".join(condiciones), parametros
+
+
+class IndiceSQL:
+
+    def __init__(self, consultas):
+        self._consultas = consultas
+        self.col_asesor = COL_ASESOR
+        self.col_fecha = COL_FECHA
+        tabla = consultas.leer(
+            f"SELECT {_q(COL_ASESOR)} AS asesor, MIN(fila) AS inicio, MAX(fila) + 1 AS fin FROM sesiones "
+            f"WHERE {_q(COL_ASESOR)} IS NOT NULL GROUP BY {_q(COL_ASESOR)} ORDER BY inicio"
+        )
+        # Rangos de filas por asesor: lo único del índice que se guarda en memoria
+        self.rangos = {a: (int(i), int(f)) for a, i, f in zip(tabla['asesor'], tabla['inicio'], tabla['fin'])}
+
+    def asesores(self):
+        return list(self.rangos)
+
+    def sesiones_por_asesor(self):
+        return pd.Series(
+            [fin - inicio for inicio, fin in self.rangos.values()],
+            index=pd.Index(list(self.rangos), name=self.col_asesor)
+        )
+
+    def rango(self, asesor, desde=None, hasta=None):
+        if desde is None and hasta is None:
+            return self.rangos.get(asesor, (0, 0))
+        condicion, parametros = self._consultas.filtro(asesor, desde, hasta)
+        inicio, fin = self._consultas.leer(
+            f"SELECT MIN(fila) AS inicio, MAX(fila) + 1 AS fin FROM sesiones WHERE {condicion}", parametros
+        ).iloc[0]
+        if pd.isna(inicio):
+            return (0, 0)
+        return int(inicio), int(fin)
+
+    def sesiones(self, asesor, desde=None, hasta=None):
+        condicion, parametros = self._consultas.filtro(asesor, desde, hasta)
+        df = self._consultas.leer(f"SELECT * FROM sesiones WHERE {condicion} ORDER BY fila", parametros)
+        # El índice es la posición en la tabla ordenada, como en IndiceAsesores
+        return df.set_index('fila').rename_axis(None)
+
+    def sesiones_varios(self, asesores, desde=None, hasta=None):
+        return self.sesiones(list(dict.fromkeys(asesores)), desde, hasta)
+
+
+class CuboSQL:
+
+    def __init__(self, consultas):
+        self._consultas = consultas
+        self.col_asesor = COL_ASESOR
+        self.col_fecha = COL_FECHA
+
+    def _agregados(self):
+        return (
+            f"COUNT(*) AS sesiones, "
+            f"COALESCE(SUM({_q('Duración de Capa')}), 0) AS duracion_total, "
+            f"COUNT({_q('Duración de Capa')}) AS duracion_n, "
+            f"COALESCE(SUM({_q('Puntaje Promedio')}), 0) AS puntaje_suma, "
+            f"COUNT({_q('Puntaje Promedio')}) AS puntaje_n"
+        )
+
+    def resumen(self, asesor, desde=None, hasta=None):
+        condicion, parametros = self._consultas.filtro(asesor, desde, hasta)
+        totales = self._consultas.leer(
+            f"SELECT {self._agregados()} FROM sesiones WHERE {condicion}", parametros
+        ).iloc[0]
+        duracion_n = totales['duracion_n']
+        puntaje_n = totales['puntaje_n']
+        return {
+            'sesiones': int(totales['sesiones']),
+            'duracion_total': float(totales['duracion_total']),
+            'duracion_media': totales['duracion_total'] / duracion_n if duracion_n else np.nan,
+            'puntaje_medio': totales['puntaje_suma'] / puntaje_n if puntaje_n else np.nan,
+        }
+
+    def serie(self, asesor, frecuencia='D', desde=None, hasta=None):
+        # Como en el cubo, el rango se aplica al inicio de cada periodo
+        periodo = PERIODOS[frecuencia].format(fecha=_q(COL_FECHA))
+        condicion, parametros = self._consultas.filtro(asesor, desde, hasta, periodo)
+        df = self._consultas.leer(
+            f"SELECT {_q(COL_ASESOR)}, {periodo} AS {_q(COL_FECHA)}, {self._agregados()} FROM sesiones "
+            f"WHERE {condicion} AND {_q(COL_FECHA)} IS NOT NULL GROUP BY 2 ORDER BY 2",
+            parametros
+        )
+        return df[[COL_ASESOR, COL_FECHA] + COLUMNAS_CUBO]
+
+
+class MandamientosSQL:
+
+    def __init__(self, consultas):
+        self._consultas = consultas
+        self.vocabulario = consultas.leer("SELECT mandamiento FROM vocabulario ORDER BY columna")['mandamiento'].tolist()
+
+    def conteos(self, inicio=0, fin=None):
+        fin = np.iinfo(np.int64).max if fin is None else fin
+        tabla = self._consultas.leer(
+            "SELECT columna, COUNT(*) AS n FROM mandamientos WHERE fila >= ? AND fila < ? GROUP BY columna",
+            (int(inicio), int(fin))
+        )
+        conteos = np.zeros(len(self.vocabulario), dtype='int64')
+        conteos[tabla['columna'].to_numpy(dtype='int64')] = tabla['n'].to_numpy(dtype='int64')
+        return conteos
+
+    def frecuencias(self, inicio=0, fin=None):
+        tabla = pd.DataFrame({'Mandamiento': self.vocabulario, 'Frecuencia': self.conteos(inicio, fin)})
+        tabla = tabla[tabla['Frecuencia'] > 0]
+        return tabla.sort_values('Frecuencia', ascending=False, kind='mergesort').reset_index(drop=True)
+
+    def por_asesor(self, indice):
+        largo = self._consultas.leer(
+            f"SELECT s.{_q(COL_ASESOR)} AS asesor, m.columna, COUNT(*) AS n FROM mandamientos m "
+            f"JOIN sesiones s ON s.fila = m.fila WHERE s.{_q(COL_ASESOR)} IS NOT NULL GROUP BY 1, 2"
+        )
+        conteos = largo.pivot(index='asesor', columns='columna', values='n')
+        conteos = conteos.reindex(index=indice.asesores(), columns=range(len(self.vocabulario)), fill_value=0)
+        conteos = conteos.fillna(0).astype('int64')
+        conteos.index.name = indice.col_asesor
+        conteos.columns = self.vocabulario
+        return conteos
+
+
+class TextoSQL:
+    # Mismas búsquedas que IndiceTexto: el prefijo de un término es un rango
+    # del índice (token, fila) de la tabla 'texto'
+
+    def __init__(self, consultas):
+        self._consultas = consultas
+        self.columnas = consultas.meta['columnas_texto']
+
+    def coincidencias(self, termino):
+        tabla = self._consultas.leer(
+            "SELECT fila, mascara FROM texto WHERE token >= ? AND token < ?", (termino, termino + '\U0010ffff')
+        )
+        return _unir_filas(tabla['fila'].to_numpy(dtype='int64'), tabla['mascara'].to_numpy(dtype='uint8'))
+
+    def buscar(self, consulta):
+        lista = terminos(consulta)
+        if not lista:
+            return np.array([], dtype='int64'), np.array([], dtype='uint8')
+        return intersectar([self.coincidencias(termino) for termino in lista])
+
+    def etiquetas(self, mascaras):
+        return [", ".join(c for k, c in enumerate(self.columnas) if m >> k & 1) for m in mascaras]
+
+
+class ConjuntoSQL:
+
+    def __init__(self, ruta_db, meta):
+        self.ruta_db = ruta_db
+        self.version = meta['version']
+        self._consultas = _Consultas(ruta_db, meta)
+        self.indice = IndiceSQL(self._consultas)
+        self.cubo = CuboSQL(self._consultas)
+        self.mandamientos = MandamientosSQL(self._consultas)
+        self.texto = TextoSQL(self._consultas)
+        self._ranking = None
+        self._tendencias = CacheTendencias()
+
+    def rango_fechas(self):
+        fila = self._consultas.leer(f"SELECT MIN({_q(COL_FECHA)}) AS minima, MAX({_q(COL_FECHA)}) AS maxima FROM sesiones").iloc[0]
+        return pd.Timestamp(fila['minima']), pd.Timestamp(fila['maxima'])
+
+    def buscar(self, consulta, limite=None):
+        # Como ConjuntoDatos.buscar; solo se leen las sesiones que se devuelven
+        filas, mascaras = self.texto.buscar(consulta)
+        filas, total = filas[:limite], len(filas)
+        marcas = ", ".join("?" * len(filas))
+        tabla = self._consultas.leer(f"SELECT * FROM sesiones WHERE fila IN ({marcas}) ORDER BY fila", filas.tolist())
+        tabla = tabla.set_index('fila').rename_axis(None)
+        return total, tabla.assign(Coincidencias=self.texto.etiquetas(mascaras[:limite]))
+
+    def ranking(self):
+        # Mismo resultado que agregados.resumen_por_asesor, con un GROUP BY
+        if self._ranking is None:
+            criterios = ", ".join(f"AVG({_q(c)}) AS {_q(c)}" for c in COLUMNAS_EXPERTISE)
+            tabla = self._consultas.leer(
+                f"SELECT {_q(COL_ASESOR)}, COUNT(*) AS sesiones, "
+                f"COALESCE(SUM({_q('Duración de Capa')}), 0) AS duracion_total, "
+                f"AVG({_q('Duración de Capa')}) AS duracion_media, AVG({_q('Puntaje Promedio')}) AS puntaje_medio, "
+                f"{criterios} FROM sesiones WHERE {_q(COL_ASESOR)} IS NOT NULL "
+                f"GROUP BY {_q(COL_ASESOR)} ORDER BY {_q(COL_ASESOR)}"
+            )
+            if self._consultas.meta['con_mandamientos']:
+                no_cumplidos = self.mandamientos.por_asesor(self.indice).sum(axis=1)
+                posibles = tabla['sesiones'] * TOTAL_MANDAMIENTOS
+                no_cumplidos = no_cumplidos.reindex(tabla[COL_ASESOR]).to_numpy()
+                tabla['cumplimiento'] = ((1 - no_cumplidos / posibles) * 100).clip(lower=0)
+            else:
+                tabla['cumplimiento'] = np.nan
+            self._ranking = tabla
+        return self._ranking
+
+    def tendencias(self, ventana, unidad='sesiones'):
+        # Las ventanas móviles se calculan con NumPy sobre las columnas que
+        # necesitan, leídas una vez en el orden de la tabla
+        def construir():
+            columnas = ", ".join(_q(c) for c in [COL_FECHA] + COLUMNAS_TENDENCIA)
+            tabla = self._consultas.leer(f"SELECT {columnas} FROM sesiones ORDER BY fila")
+            return TendenciasAsesores(tabla, self.indice.rangos, COLUMNAS_TENDENCIA, ventana, unidad)
+
+        return self._tendencias.obtener((int(ventana), unidad), construir)
+
+
+def obtener_almacen(ruta=datos.LIBROS, columnas=None):
+    # Igual que datos.obtener_conjunto, pero el conjunto vive en SQLite. Si la
+    # base ya corresponde a la versión actual (Excel + entrantes, o las rondas)
+    # se abre sin leer el Excel; si no, se carga una vez con pandas, se vuelca y
+    # se libera
+    columnas = datos.proyeccion(columnas)
+    rutas = datos.rutas_libros(ruta)
+    if len(rutas) > 1:
+        clave = (tuple(os.path.abspath(r) for r in rutas), None if columnas is None else tuple(columnas))
+        version = datos.version_rondas(rutas)
+        cargar = lambda: datos.cargar_rondas(rutas, version, columnas)
+        # Una base para todas las rondas, en la caché de la carpeta de los libros
+        ruta_base = os.path.join(os.path.dirname(os.path.abspath(rutas[0])), 'Rondas')
+    else:
+        ruta = rutas[0]
+        clave = (os.path.abspath(ruta), None if columnas is None else tuple(columnas))
+        carpeta = os.path.join(os.path.dirname(clave[0]), datos.DIR_ENTRANTES)
+        version_libro = datos.version_archivo(ruta)
+        entrantes = datos.listar_entrantes(carpeta)
+        version = datos._version_combinada(version_libro, entrantes)
+        cargar = lambda: datos._actualizar_conjunto(None, ruta, version_libro, entrantes, columnas)
+        ruta_base = ruta
+    actual = _almacenes.get(clave)
+    if actual is not None and actual.version == version:
+        return actual
+    with _lock_almacenes:
+        actual = _almacenes.get(clave)
+        if actual is None or actual.version != version:
+            ruta_db = _ruta_almacen(ruta_base, columnas)
+            meta = _leer_meta(ruta_db)
+            if meta is None or meta['version'] != version:
+                conjunto = cargar()
+                os.makedirs(os.path.dirname(ruta_db), exist_ok=True)
+                datos._escribir_atomico(ruta_db, lambda tmp: _volcar(conjunto, tmp))
+                del conjunto
+                meta = _leer_meta(ruta_db)
+            actual = ConjuntoSQL(ruta_db, meta)
+            _almacenes[clave] = actual
+    return actual
@@ -0,0 +1,173 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import datos
+from agregados import CuboSesiones
+from generar_sinteticos import DIR_SINTETICOS, TAMANOS, generar_archivo
+from graficos import CacheFiguras, cache_figuras
+from indices import IndiceAsesores, MatrizMandamientos
+
+# Fases medidas en cada rerun; 'render' es el resto del rerun (widgets, tablas,
+# markdown y serialización de los elementos de Streamlit)
+FASES = ['carga', 'filtro', 'agregado', 'figuras', 'render']
+
+# Funciones que se cronometran y la fase a la que pertenecen
+MEDIDAS = [
+    (datos, 'obtener_conjunto', 'carga'),
+    (IndiceAsesores, 'sesiones', 'filtro'),
+    (IndiceAsesores, 'rango', 'filtro'),
+    (IndiceAsesores, 'sesiones_por_asesor', 'agregado'),
+    (CuboSesiones, 'resumen', 'agregado'),
+    (CuboSesiones, 'serie', 'agregado'),
+    (MatrizMandamientos, 'frecuencias', 'agregado'),
+    (MatrizMandamientos, 'por_asesor', 'agregado'),
+    (CacheFiguras, 'obtener', 'figuras'),
+]
+
+
+class Cronometro:
+    # Acumula el tiempo de cada fase durante un rerun. Solo cuenta la llamada más
+    # externa: un gráfico que filtra o agrega adentro se mide como 'figuras'
+
+    def __init__(self):
+        self.tiempos = dict.fromkeys(FASES, 0.0)
+        self._activa = False
+
+    def envolver(self, funcion, fase):
+        def medida(*args, **kwargs):
+            if self._activa:
+                return funcion(*args, **kwargs)
+            self._activa = True
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                self.tiempos[fase] += time.perf_counter() - inicio
+                self._activa = False
+        return medida
+
+    def reiniciar(self):
+        self.tiempos = dict.fromkeys(FASES, 0.0)
+
+
+def instrumentar(cronometro):
+    # Reemplaza las funciones medidas por versiones cronometradas; devuelve una
+    # función que deja todo como estaba
+    originales = [(objetivo, nombre, getattr(objetivo, nombre)) for objetivo, nombre, _ in MEDIDAS]
+    for (objetivo, nombre, fase), (_, _, original) in zip(MEDIDAS, originales):
+        setattr(objetivo, nombre, cronometro.envolver(original, fase))
+
+    def restaurar():
+        for objetivo, nombre, original in originales:
+            setattr(objetivo, nombre, original)
+    return restaurar
+
+
+def _selector_asesor(at):
+    for selector in at.selectbox:
+        if 'Asesor' in selector.label:
+            return selector
+    return None
+
+
+def _medir_rerun(at, cronometro, preparar=None):
+    cronometro.reiniciar()
+    inicio = time.perf_counter()
+    if preparar is not None:
+        preparar()
+    at.run()
+    total = time.perf_counter() - inicio
+    tiempos = dict(cronometro.tiempos)
+    tiempos['render'] = max(0.0, total - sum(tiempos[fase] for fase in FASES if fase != 'render'))
+    tiempos['total'] = total
+    if at.exception:
+        tiempos['error'] = at.exception[0].value
+    return tiempos
+
+
+def medir_script(script, carpeta, reruns, timeout):
+    # Una corrida en frío (sin copia columnar ni dataset en memoria) y 'reruns'
+    # corridas en caliente, cada una con otro asesor para que los gráficos no
+    # salgan de la caché
+    shutil.rmtree(os.path.join(carpeta, datos.DIR_CACHE), ignore_errors=True)
+    datos._conjuntos.clear()
+    cache_figuras.limpiar()
+    cronometro = Cronometro()
+    restaurar = instrumentar(cronometro)
+    directorio_previo = os.getcwd()
+    os.chdir(carpeta)
+    try:
+        at = AppTest.from_file(os.path.abspath(os.path.join(directorio_previo, script)), default_timeout=timeout)
+        fria = _medir_rerun(at, cronometro)
+        calientes = []
+        selector = _selector_asesor(at)
+        opciones = list(selector.options) if selector is not None else []
+        for i in range(reruns):
+            preparar = None
+            if len(opciones) > 1:
+                preparar = lambda asesor=opciones[(i + 1) % len(opciones)]: _selector_asesor(at).set_value(asesor)
+            calientes.append(_medir_rerun(at, cronometro, preparar))
+    finally:
+        os.chdir(directorio_previo)
+        restaurar()
+        datos._conjuntos.clear()
+    return fria, calientes
+
+
+def _mediana(corridas, clave):
+    return statistics.median(corrida[clave] for corrida in corridas) if corridas else float('nan')
+
+
+def scripts_disponibles():
+    # main (N).py ordenados por N
+    return sorted(glob.glob('main (*).py'), key=lambda ruta: int(re.search(r'\((\d+)\)', ruta).group(1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide los tiempos por rerun de cada main (N).py con datos sintéticos")
+    parser.add_argument('--filas', type=int, nargs='+', default=TAMANOS)
+    parser.add_argument('--scripts', type=int, nargs='*', help="Números N de main (N).py; por defecto todos")
+    parser.add_argument('--reruns', type=int, default=5, help="Reruns en caliente por script")
+    parser.add_argument('--timeout', type=float, default=900, help="Segundos máximos por rerun")
+    parser.add_argument('--carpeta', default=DIR_SINTETICOS)
+    parser.add_argument('--json', help="Archivo donde guardar los resultados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    scripts = scripts_disponibles()
+    if args.scripts:
+        scripts = [s for s in scripts if int(re.search(r'\((\d+)\)', s).group(1)) in args.scripts]
+
+    resultados = []
+    print(f"{'filas':>9} {'script':<14} {'corrida':<9}" + ''.join(f"{fase:>10}" for fase in FASES + ['total']))
+    for filas in args.filas:
+        carpeta = os.path.dirname(generar_archivo(filas, args.carpeta))
+        for script in scripts:
+            fria, calientes = medir_script(script, carpeta, args.reruns, args.timeout)
+            resultado = {'filas': filas, 'script': script, 'fria': fria, 'calientes': calientes}
+            resultados.append(resultado)
+            for nombre, valores in [('fría', fria), ('caliente', {c: _mediana(calientes, c) for c in FASES + ['total']})]:
+                print(
+                    f"{filas:>9} {script:<14} {nombre:<9}"
+                    + ''.join(f"{valores[fase] * 1000:>8.1f}ms" for fase in FASES + ['total'])
+                )
+            errores = [corrida['error'] for corrida in [fria] + calientes if 'error' in corrida]
+            if errores:
+                print(f"          error: {errores[0][:200]}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,637 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from agregados import CacheTendencias, CuboSesiones, TendenciasAsesores, resumen_por_asesor
+from esquema import aplicar_esquema, unir_informes
+from indices import IndiceAsesores, IndiceTexto, MatrizMandamientos
+
+# Con copy-on-write, los slices y las copias superficiales del dataset compartido
+# no duplican datos, y escribir sobre ellos nunca modifica la tabla base.
+# Desde pandas 3 está siempre activo.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+ARCHIVO_EXCEL = 'Entrenamiento_R3.xlsx'
+
+logger = logging.getLogger(__name__)
+
+# Carpeta donde se guarda la copia columnar (Arrow IPC) de cada libro Excel
+DIR_CACHE = '.cache_datos'
+
+COLUMNA_MANDAMIENTOS = '¿Cuál o cuáles mandamientos NO cumple?'
+
+# Carpeta vigilada, junto al Excel, donde los evaluadores dejan archivos CSV o
+# XLSX con sesiones nuevas o corregidas (mismas columnas que el Excel)
+DIR_ENTRANTES = 'entrantes'
+EXTENSIONES_ENTRANTES = ('.csv', '.xlsx')
+
+COLUMNAS_EXPERTISE = [
+    'Nivel de Expertise en Presentación',
+    'Nivel de Expertise en Sondeo',
+    'Nivel de Expertise en Argumentación',
+    'Nivel de Expertise en Rebate',
+    'Nivel de Expertise en Cierre'
+]
+
+# Columnas con tendencia móvil (ConjuntoDatos.tendencias)
+COLUMNAS_TENDENCIA = COLUMNAS_EXPERTISE + ['Puntaje Promedio']
+
+# Columnas de texto libre con búsqueda por palabras (ConjuntoDatos.buscar)
+COLUMNAS_TEXTO = [
+    'Presentación', 'Sondeo', 'Argumentación', 'Rebate', 'Cierre',
+    'Detalles o Comentarios Adicionales'
+]
+
+# Columnas que siempre se leen, aunque la vista no las declare: con ellas se
+# arman el índice, el cubo y el Puntaje Promedio
+COLUMNAS_BASE = ['ID', 'Asesor Evaluado', 'Evaluador', 'Fecha de Capa', 'Duración de Capa'] + COLUMNAS_EXPERTISE
+
+# Con DASHBOARD_BACKEND=sqlite las vistas consultan una base SQLite (almacen.py)
+# en lugar de mantener el dataset en memoria con pandas
+VARIABLE_BACKEND = 'DASHBOARD_BACKEND'
+
+# Un libro por ronda de capacitación (Entrenamiento_R1.xlsx, _R2, _R3...).
+# Con DASHBOARD_LIBROS='Entrenamiento_R*.xlsx' (o una carpeta) los scripts
+# cargan todas las rondas juntas, con la columna 'Ronda' en cada fila
+VARIABLE_LIBROS = 'DASHBOARD_LIBROS'
+LIBROS = os.environ.get(VARIABLE_LIBROS) or ARCHIVO_EXCEL
+PATRON_RONDAS = 'Entrenamiento_R*.xlsx'
+COLUMNA_RONDA = 'Ronda'
+
+# Filas del Excel que se convierten a DataFrame de una vez al leer en streaming
+TAM_LOTE = 5000
+
+# Textos que pd.read_excel interpreta como celda vacía
+VALORES_NULOS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+# Última huella vista de cada archivo: ruta -> (mtime_ns, tamaño, sha256)
+_huellas = {}
+_lock_huellas = threading.Lock()
+
+# Dataset compartido por todas las sesiones y scripts del proceso: ruta -> ConjuntoDatos
+_conjuntos = {}
+_lock_conjuntos = threading.Lock()
+
+
+def hash_archivo(ruta, tam_bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def proyeccion(columnas):
+    # Columnas a leer para una vista: las base más las declaradas, sin repetir.
+    # None significa todas las columnas del libro
+    if columnas is None:
+        return None
+    return list(dict.fromkeys(COLUMNAS_BASE + list(columnas)))
+
+
+def _rutas_cache(ruta, columnas=None):
+    base = os.path.splitext(os.path.basename(ruta))[0]
+    if columnas is not None:
+        # Una copia columnar por proyección
+        base += '.' + hashlib.sha256(json.dumps(columnas).encode()).hexdigest()[:12]
+    carpeta = os.path.join(os.path.dirname(os.path.abspath(ruta)), DIR_CACHE)
+    return carpeta, os.path.join(carpeta, base + '.arrow'), os.path.join(carpeta, base + '.json')
+
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_atomico(ruta_destino, escribir):
+    # Se escribe en un temporal de la misma carpeta y se renombra, para que un
+    # lector concurrente nunca vea un archivo a medio escribir
+    carpeta = os.path.dirname(ruta_destino)
+    fd, tmp = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+    os.close(fd)
+    try:
+        escribir(tmp)
+        os.replace(tmp, ruta_destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _nombres_unicos(encabezado):
+    # Igual que pd.read_excel: los encabezados repetidos reciben sufijo '.1', '.2'...
+    vistos = {}
+    nombres = []
+    for i, nombre in enumerate(encabezado):
+        nombre = f"Unnamed: {i}" if nombre is None else str(nombre)
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+def leer_columnas_excel(ruta, columnas=None, tam_lote=TAM_LOTE):
+    # Lee la primera hoja fila por fila con openpyxl en modo solo lectura y se
+    # queda únicamente con las columnas pedidas, armando un DataFrame por lote:
+    # nunca se materializan en memoria las celdas de las columnas que no se usan
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        nombres = _nombres_unicos(next(filas, ()))
+        if columnas is None:
+            posiciones = list(range(len(nombres)))
+        else:
+            # Las columnas pedidas que no están en el libro se omiten
+            posiciones = [nombres.index(c) for c in columnas if c in nombres]
+        seleccion = [nombres[i] for i in posiciones]
+        lotes = []
+        lote = []
+        for fila in filas:
+            valores = [fila[i] if i < len(fila) else None for i in posiciones]
+            valores = [None if isinstance(v, str) and v in VALORES_NULOS else v for v in valores]
+            # Las filas vacías se descartan, como en pd.read_excel
+            if any(v is not None for v in valores):
+                lote.append(valores)
+            if len(lote) >= tam_lote:
+                lotes.append(pd.DataFrame(lote, columns=seleccion))
+                lote = []
+        if lote or not lotes:
+            lotes.append(pd.DataFrame(lote, columns=seleccion))
+    finally:
+        libro.close()
+    df = pd.concat(lotes, ignore_index=True) if len(lotes) > 1 else lotes[0]
+    return _tipar_columnas(df)
+
+
+def _tipar_columnas(df):
+    # Mismos tipos que daría pd.read_excel: columnas sin valores como float64 y
+    # números guardados como texto en el Excel como números
+    for columna in df.columns:
+        serie = df[columna]
+        if serie.dtype != object and not pd.api.types.is_string_dtype(serie):
+            continue
+        if serie.isna().all():
+            df[columna] = serie.astype('float64')
+            continue
+        try:
+            df[columna] = pd.to_numeric(serie)
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def leer_excel(ruta=ARCHIVO_EXCEL, columnas=None):
+    # Lee el libro desde su copia columnar si el Excel no cambió (mtime, tamaño
+    # y hash del contenido); si cambió, lo parsea con openpyxl y regenera la copia.
+    # Con 'columnas' se leen solo esas (ver proyeccion())
+    carpeta, ruta_arrow, ruta_meta = _rutas_cache(ruta, columnas)
+    stat = os.stat(ruta)
+    meta = _leer_meta(ruta_meta)
+
+    if meta is not None and os.path.exists(ruta_arrow):
+        if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('tamano') == stat.st_size:
+            return feather.read_table(ruta_arrow, memory_map=True).to_pandas()
+        # El archivo pudo ser tocado o copiado sin cambiar su contenido
+        sha256 = hash_archivo(ruta)
+        if meta.get('tamano') == stat.st_size and meta.get('sha256') == sha256:
+            meta['mtime_ns'] = stat.st_mtime_ns
+            os.makedirs(carpeta, exist_ok=True)
+            _escribir_atomico(ruta_meta, lambda tmp: _volcar_meta(tmp, meta))
+            return feather.read_table(ruta_arrow, memory_map=True).to_pandas()
+
+    else:
+        sha256 = hash_archivo(ruta)
+
+    df = leer_columnas_excel(ruta, columnas)
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columnas con tipos mezclados que Arrow no sabe representar: se usa el
+        # Excel tal cual, sin copia columnar
+        return df
+
+    meta = {
+        'mtime_ns': stat.st_mtime_ns,
+        'tamano': stat.st_size,
+        'sha256': sha256,
+    }
+    os.makedirs(carpeta, exist_ok=True)
+    # Sin compresión para poder mapear el archivo en memoria al leerlo
+    _escribir_atomico(ruta_arrow, lambda tmp: feather.write_feather(tabla, tmp, compression='uncompressed'))
+    _escribir_atomico(ruta_meta, lambda tmp: _volcar_meta(tmp, meta))
+    return df
+
+
+def _volcar_meta(ruta_meta, meta):
+    with open(ruta_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def version_archivo(ruta=ARCHIVO_EXCEL):
+    # Se llama en cada rerun: solo hace un stat, y recalcula el hash únicamente
+    # si cambió la fecha de modificación o el tamaño. La versión es el hash del
+    # contenido, así que tocar o copiar el archivo sin cambiarlo no recarga nada
+    ruta = os.path.abspath(ruta)
+    stat = os.stat(ruta)
+    with _lock_huellas:
+        previa = _huellas.get(ruta)
+    if previa is not None and previa[:2] == (stat.st_mtime_ns, stat.st_size):
+        return previa[2]
+    sha256 = hash_archivo(ruta)
+    with _lock_huellas:
+        _huellas[ruta] = (stat.st_mtime_ns, stat.st_size, sha256)
+    return sha256
+
+
+def preparar(df):
+    df, informe = aplicar_esquema(df, COLUMNAS_EXPERTISE)
+    # Calcular puntaje promedio considerando columnas de expertise
+    df['Puntaje Promedio'] = df[COLUMNAS_EXPERTISE].astype('float64').mean(axis=1)
+    return df, informe
+
+
+def hash_filas(crudo):
+    # Hash por fila de los datos tal como vienen del archivo, indexado por ID
+    columnas = sorted(c for c in crudo.columns if c != 'ID')
+    hashes = pd.util.hash_pandas_object(crudo[columnas], index=False)
+    hashes.index = crudo['ID'].to_numpy()
+    return hashes
+
+
+class ConjuntoDatos:
+    # Dataset preparado junto con las estructuras que se construyen una sola vez
+    # por versión del archivo
+    def __init__(self, df, version=None, informe=None, hashes=None):
+        self.version = version
+        self.informe = informe
+        self.indice = IndiceAsesores(df)
+        # La tabla queda ordenada por asesor y fecha
+        self.df = self.indice.tabla
+        self.cubo = CuboSesiones(self.df)
+        self.mandamientos = MatrizMandamientos(_respuestas_mandamientos(self.df))
+        # Índice invertido de las columnas de texto que lee la vista
+        self.texto = IndiceTexto(self.df, COLUMNAS_TEXTO)
+        # Hash de cada fila cruda por ID, para detectar filas nuevas o modificadas
+        self.hashes = hashes if hashes is not None else pd.Series(dtype='uint64')
+        # Origen de los datos: versión del Excel, IDs que trae y archivos entrantes ya ingeridos
+        self.version_libro = version
+        self.ids_libro = pd.Index(self.hashes.index)
+        self.columnas_crudas = [c for c in self.df.columns if c != 'Puntaje Promedio']
+        self.entrantes = {}
+        self._ranking = None
+        self._tendencias = CacheTendencias()
+
+    def rango_fechas(self):
+        return self.df['Fecha de Capa'].min(), self.df['Fecha de Capa'].max()
+
+    def ranking(self):
+        # Métricas de todos los asesores. El conjunto no cambia una vez creado,
+        # así que la tabla se calcula una sola vez por versión de los datos
+        if self._ranking is None:
+            no_cumplidos = None
+            if COLUMNA_MANDAMIENTOS in self.df:
+                no_cumplidos = self.mandamientos.por_asesor(self.indice).sum(axis=1)
+            self._ranking = resumen_por_asesor(self.df, COLUMNAS_EXPERTISE, no_cumplidos)
+        return self._ranking
+
+    def tendencias(self, ventana, unidad='sesiones'):
+        # Medias y pendientes móviles de todos los asesores, una vez por versión
+        # de los datos y por ventana; solo se guardan las últimas ventanas usadas
+        return self._tendencias.obtener(
+            (int(ventana), unidad),
+            lambda: TendenciasAsesores(self.df, self.indice.rangos, COLUMNAS_TENDENCIA, ventana, unidad)
+        )
+
+    def buscar(self, consulta, limite=None):
+        # Sesiones de todos los asesores cuyos textos contienen todas las
+        # palabras de la consulta, sin distinguir tildes ni mayúsculas; cada
+        # palabra vale también como prefijo ("objeci" encuentra "objeciones").
+        # Devuelve el total de coincidencias y las primeras 'limite' sesiones, en
+        # el orden de la tabla, con la columna 'Coincidencias'
+        filas, mascaras = self.texto.buscar(consulta)
+        tabla = self.df.iloc[filas[:limite]].assign(Coincidencias=self.texto.etiquetas(mascaras[:limite]))
+        return len(filas), tabla
+
+    @property
+    def marca_id(self):
+        # Marca de agua: el ID más alto ya ingerido
+        return int(self.hashes.index.max()) if len(self.hashes) else 0
+
+    def filas_cambiadas(self, crudo):
+        # Filas con ID mayor a la marca de agua (nuevas) o con ID conocido cuyo
+        # contenido cambió
+        sin_id = crudo['ID'].isna()
+        if sin_id.any():
+            logger.warning("%d filas sin ID se ignoran en la ingesta incremental", int(sin_id.sum()))
+        crudo = crudo[~sin_id].astype({'ID': 'int64'}).drop_duplicates('ID', keep='last')
+        hashes = hash_filas(crudo)
+        nuevas = crudo['ID'].to_numpy() > self.marca_id
+        previos = self.hashes.reindex(hashes.index).to_numpy()
+        cambiadas = ~nuevas & (pd.isna(previos) | (previos != hashes.to_numpy()))
+        seleccion = nuevas | cambiadas
+        return crudo[seleccion], hashes[seleccion]
+
+    def con_cambios(self, crudo, version=None):
+        # Nuevo conjunto con las filas nuevas o modificadas de 'crudo' aplicadas.
+        # Solo esas filas pasan por el esquema y el cálculo de Puntaje Promedio;
+        # índice, cubo y matriz de mandamientos se actualizan con el delta en lugar
+        # de reconstruirse. El conjunto actual no se modifica: las sesiones que lo
+        # están usando lo siguen viendo intacto hasta que se reemplaza
+        delta, hashes = self.filas_cambiadas(crudo)
+        nuevo = ConjuntoDatos.__new__(ConjuntoDatos)
+        nuevo.__dict__.update(self.__dict__)
+        nuevo.version = version if version is not None else self.version
+        nuevo.entrantes = dict(self.entrantes)
+        nuevo._ranking = None
+        nuevo._tendencias = CacheTendencias()
+        if delta.empty:
+            return nuevo
+
+        agregar, informe = preparar(delta.reset_index(drop=True))
+        quitar = np.flatnonzero(self.df['ID'].isin(agregar['ID']).to_numpy())
+        indice, conservar, orden = self.indice.con_cambios(quitar, agregar)
+        nuevo.indice = indice
+        nuevo.df = indice.tabla
+        nuevo.cubo = self.cubo.con_cambios(self.df.iloc[quitar], agregar)
+        nuevo.mandamientos = self.mandamientos.con_cambios(conservar, orden, _respuestas_mandamientos(agregar))
+        nuevo.texto = self.texto.con_cambios(conservar, orden, agregar)
+        nuevo.hashes = pd.concat([self.hashes.drop(hashes.index, errors='ignore'), hashes])
+        nuevo.informe = unir_informes(self.informe, informe, len(self.df))
+        logger.info("Ingesta incremental: %d filas nuevas o modificadas (%d reemplazadas)", len(agregar), len(quitar))
+        return nuevo
+
+
+def _respuestas_mandamientos(df):
+    # Si la vista no lee la columna de mandamientos, la matriz queda vacía
+    if COLUMNA_MANDAMIENTOS in df:
+        return df[COLUMNA_MANDAMIENTOS]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def cargar_conjunto(ruta=ARCHIVO_EXCEL, version=None, columnas=None):
+    crudo = leer_excel(ruta, columnas)
+    df, informe = preparar(crudo)
+    conjunto = ConjuntoDatos(df, version, informe, hash_filas(crudo.drop_duplicates('ID', keep='last')))
+    conjunto.columnas_crudas = list(crudo.columns)
+    return conjunto
+
+
+def listar_entrantes(carpeta):
+    # Archivos CSV/XLSX de la carpeta vigilada: nombre -> (mtime_ns, tamaño)
+    try:
+        entradas = list(os.scandir(carpeta))
+    except FileNotFoundError:
+        return {}
+    return {
+        entrada.name: (entrada.stat().st_mtime_ns, entrada.stat().st_size)
+        for entrada in entradas
+        if entrada.is_file() and entrada.name.lower().endswith(EXTENSIONES_ENTRANTES)
+        and not entrada.name.startswith(('~$', '.'))
+    }
+
+
+def leer_entrante(ruta, columnas):
+    if ruta.lower().endswith('.csv'):
+        df = pd.read_csv(ruta, usecols=lambda c: c in columnas)
+    else:
+        df = leer_columnas_excel(ruta, columnas)
+    # Las columnas que falten en el archivo quedan vacías
+    return df.reindex(columns=columnas)
+
+
+def _actualizar_conjunto(actual, ruta, version_libro, entrantes, columnas=None):
+    carpeta = os.path.join(os.path.dirname(os.path.abspath(ruta)), DIR_ENTRANTES)
+    conjunto = actual
+    # Si se borró un archivo entrante, sus filas ya no tienen origen: carga completa
+    if conjunto is not None and any(nombre not in entrantes for nombre in conjunto.entrantes):
+        conjunto = None
+    if conjunto is not None and conjunto.version_libro != version_libro:
+        crudo = leer_excel(ruta, columnas)
+        # Si el Excel perdió filas o cambió de columnas no hay delta posible
+        if conjunto.ids_libro.isin(crudo['ID']).all() and list(crudo.columns) == conjunto.columnas_crudas:
+            conjunto = conjunto.con_cambios(crudo)
+            conjunto.version_libro = version_libro
+            conjunto.ids_libro = pd.Index(crudo['ID'])
+            # El delta del Excel se compara con las filas vigentes, que ya tienen
+            # las correcciones de los archivos entrantes, y las pisa con la
+            # versión del libro: se vuelven a aplicar todos los entrantes, en el
+            # mismo orden que en una carga completa
+            conjunto.entrantes = {}
+        else:
+            conjunto = None
+    if conjunto is None:
+        conjunto = cargar_conjunto(ruta, version_libro, columnas)
+
+    # Archivos entrantes nuevos o modificados desde la última ingesta
+    pendientes = [nombre for nombre, firma in sorted(entrantes.items()) if conjunto.entrantes.get(nombre) != firma]
+    if pendientes:
+        crudo = pd.concat(
+            [leer_entrante(os.path.join(carpeta, nombre), conjunto.columnas_crudas) for nombre in pendientes],
+            ignore_index=True
+        )
+        conjunto = conjunto.con_cambios(crudo)
+        conjunto.entrantes.update({nombre: entrantes[nombre] for nombre in pendientes})
+
+    conjunto.version = _version_combinada(version_libro, conjunto.entrantes)
+    return conjunto
+
+
+def _version_combinada(version_libro, entrantes):
+    if not entrantes:
+        return version_libro
+    firma = hashlib.sha256(json.dumps(sorted(entrantes.items())).encode()).hexdigest()
+    return f"{version_libro}+{firma[:16]}"
+
+
+def rutas_libros(ruta):
+    # 'ruta' puede ser un libro, un patrón glob o una carpeta con un libro por
+    # ronda. Se ordenan por número de ronda (R2 antes que R10)
+    if os.path.isdir(ruta):
+        rutas = glob.glob(os.path.join(ruta, PATRON_RONDAS))
+    elif glob.has_magic(ruta):
+        rutas = glob.glob(ruta)
+    else:
+        return [ruta]
+    rutas = [r for r in rutas if not os.path.basename(r).startswith(('~$', '.'))]
+    if not rutas:
+        raise FileNotFoundError(f"No hay libros de rondas en {ruta}")
+    return sorted(rutas, key=lambda r: (_numero_ronda(r), os.path.basename(r)))
+
+
+def _numero_ronda(ruta):
+    coincidencia = re.search(r'_R(\d+)$', os.path.splitext(os.path.basename(ruta))[0], re.IGNORECASE)
+    return int(coincidencia.group(1)) if coincidencia else float('inf')
+
+
+def nombre_ronda(ruta):
+    # "Entrenamiento_R3.xlsx" -> "R3"; otros nombres se usan sin extensión
+    numero = _numero_ronda(ruta)
+    return f"R{numero}" if numero != float('inf') else os.path.splitext(os.path.basename(ruta))[0]
+
+
+def _copia_vigente(ruta, columnas):
+    # True si la copia columnar corresponde al libro tal como está (solo stat)
+    _, ruta_arrow, ruta_meta = _rutas_cache(ruta, columnas)
+    meta = _leer_meta(ruta_meta)
+    stat = os.stat(ruta)
+    return (
+        meta is not None and os.path.exists(ruta_arrow)
+        and meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('tamano') == stat.st_size
+    )
+
+
+def _parsear_libro(ruta, columnas):
+    # En el proceso trabajador: parsea el libro y deja su copia columnar. No
+    # devuelve el DataFrame para no serializarlo de vuelta; el proceso principal
+    # lo lee mapeando la copia en memoria
+    leer_excel(ruta, columnas)
+
+
+# Cada trabajador es un intérprete nuevo que solo importa este módulo. No se usa
+# multiprocessing: con fork el hijo puede heredar locks tomados por otros hilos
+# del servidor (y quien llama tiene tomado _lock_conjuntos), y con spawn o
+# forkserver el hijo vuelve a ejecutar el __main__ del padre, que bajo
+# Streamlit es el script del dashboard
+_CODIGO_TRABAJADOR = "import json, sys; from datos import _parsear_libro; _parsear_libro(sys.argv[1], json.loads(sys.argv[2]))"
+
+
+def _parsear_en_proceso(ruta, columnas):
+    resultado = subprocess.run(
+        [sys.executable, '-c', _CODIGO_TRABAJADOR, os.path.abspath(ruta), json.dumps(columnas)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falló el parseo de {ruta}:\n{resultado.stderr[-2000:]}")
+
+
+def leer_rondas(rutas, columnas=None, procesos=None):
+    # Solo los libros sin copia columnar vigente se parsean, en paralelo y uno
+    # por proceso; los demás se leen directamente de su copia. Los hilos solo
+    # esperan a su proceso trabajador
+    pendientes = [ruta for ruta in rutas if not _copia_vigente(ruta, columnas)]
+    if len(pendientes) > 1:
+        procesos = min(len(pendientes), procesos or os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=procesos) as ejecutor:
+            list(ejecutor.map(_parsear_en_proceso, pendientes, [columnas] * len(pendientes)))
+    crudos = [leer_excel(ruta, columnas) for ruta in rutas]
+    return _unir_rondas(crudos, [nombre_ronda(ruta) for ruta in rutas])
+
+
+def _unir_rondas(crudos, rondas):
+    # Las rondas pueden diferir en columnas (agregadas o quitadas del formulario)
+    # y en tipos (una columna vacía en una ronda se lee como float64). Se usa la
+    # unión de columnas en orden de aparición; a las columnas vacías o ausentes
+    # de una ronda se les da el tipo que tienen en las rondas con datos, para que
+    # la concatenación no las convierta en object
+    columnas = list(dict.fromkeys(c for crudo in crudos for c in crudo.columns))
+    tipos = {}
+    for crudo in crudos:
+        for columna in crudo.columns:
+            if columna not in tipos and crudo[columna].notna().any():
+                tipos[columna] = crudo[columna].dtype
+    alineados = []
+    for crudo in crudos:
+        vacias = {
+            columna: pd.Series(None, index=crudo.index, dtype=tipos[columna])
+            for columna in columnas
+            if columna in tipos and not pd.api.types.is_numeric_dtype(tipos[columna])
+            and (columna not in crudo or (crudo[columna].dtype != tipos[columna] and crudo[columna].isna().all()))
+        }
+        alineados.append(crudo.assign(**vacias).reindex(columns=columnas) if vacias else crudo.reindex(columns=columnas))
+    # Una sola concatenación al final; la ronda es una categoría ordenada que
+    # se arma con códigos, sin repetir textos por fila
+    crudo = pd.concat(alineados, ignore_index=True)
+    categorias = list(dict.fromkeys(rondas))
+    codigos = np.repeat([categorias.index(ronda) for ronda in rondas], [len(c) for c in crudos])
+    crudo[COLUMNA_RONDA] = pd.Categorical.from_codes(codigos, categories=categorias, ordered=True)
+    return crudo
+
+
+def version_rondas(rutas):
+    # Huella del conjunto de rondas: cambia si cambia, aparece o se quita un libro
+    firmas = [(nombre_ronda(ruta), version_archivo(ruta)) for ruta in rutas]
+    return hashlib.sha256(json.dumps(firmas).encode()).hexdigest()
+
+
+def cargar_rondas(rutas, version=None, columnas=None, procesos=None):
+    # Los IDs se repiten entre rondas (cada formulario numera desde 1), así que
+    # no hay ingesta incremental por ID: si cambia una ronda se vuelve a armar
+    # el conjunto, pero solo se parsean los libros que cambiaron
+    df, informe = preparar(leer_rondas(rutas, columnas, procesos))
+    conjunto = ConjuntoDatos(df, version, informe)
+    conjunto.version_libro = version
+    return conjunto
+
+
+def _conjunto_rondas(rutas, columnas):
+    clave = (tuple(os.path.abspath(ruta) for ruta in rutas), None if columnas is None else tuple(columnas))
+    version = version_rondas(rutas)
+    actual = _conjuntos.get(clave)
+    if actual is not None and actual.version == version:
+        return actual
+    with _lock_conjuntos:
+        actual = _conjuntos.get(clave)
+        if actual is None or actual.version != version:
+            carpeta = os.path.join(os.path.dirname(os.path.abspath(rutas[0])), DIR_ENTRANTES)
+            if listar_entrantes(carpeta):
+                logger.warning("Con varias rondas no se aplican los archivos de %s", carpeta)
+            actual = cargar_rondas(rutas, version, columnas)
+            _conjuntos[clave] = actual
+    return actual
+
+
+def obtener_conjunto(ruta=ARCHIVO_EXCEL, columnas=None):
+    # Equivalente a st.cache_resource pero a nivel de módulo, para que también lo
+    # compartan los scripts de línea de comandos. Todas las sesiones reciben el
+    # mismo objeto; cuando el Excel o la carpeta de entrantes cambian, la primera
+    # sesión que lo nota aplica los cambios (las demás esperan en el lock) y el
+    # conjunto se reemplaza de una vez.
+    # 'columnas' declara las columnas que usa la vista (además de COLUMNAS_BASE);
+    # cada proyección tiene su propio conjunto compartido.
+    # 'ruta' también puede ser un patrón o una carpeta con varias rondas
+    if os.environ.get(VARIABLE_BACKEND, '').strip().lower() == 'sqlite':
+        # Import local: almacen importa este módulo
+        from almacen import obtener_almacen
+        return obtener_almacen(ruta, columnas)
+    columnas = proyeccion(columnas)
+    rutas = rutas_libros(ruta)
+    if len(rutas) > 1:
+        return _conjunto_rondas(rutas, columnas)
+    ruta = rutas[0]
+    clave = (os.path.abspath(ruta), None if columnas is None else tuple(columnas))
+    carpeta = os.path.join(os.path.dirname(clave[0]), DIR_ENTRANTES)
+    version_libro = version_archivo(ruta)
+    entrantes = listar_entrantes(carpeta)
+    actual = _conjuntos.get(clave)
+    if actual is not None and actual.version_libro == version_libro and actual.entrantes == entrantes:
+        return actual
+    with _lock_conjuntos:
+        actual = _conjuntos.get(clave)
+        if actual is None or actual.version_libro != version_libro or actual.entrantes != entrantes:
+            actual = _actualizar_conjunto(actual, ruta, version_libro, entrantes, columnas)
+            _conjuntos[clave] = actual
+    return actual
@@ -0,0 +1,124 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_CATEGORIA = ['Asesor Evaluado', 'Evaluador', 'Herramienta Evaluada']
+
+COLUMNAS_FECHA = ['Fecha de Capa']
+
+COLUMNA_CUMPLE = '¿Cumple los 6 Mandamientos de la Venta Carrión?'
+
+COLUMNAS_DECIMAL = ['Duración de Capa']
+
+# Formatos aceptados para fechas escritas como texto, en orden de prioridad
+FORMATOS_FECHA = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%Y %H:%M:%S']
+
+# Origen de los números de serie de fecha de Excel
+ORIGEN_EXCEL = '1899-12-30'
+
+
+def _filas_fallidas(original, convertida):
+    # Filas con valor en el Excel que no se pudieron convertir
+    return original.index[original.notna() & convertida.isna()].tolist()
+
+
+def convertir_fecha(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    numericos = pd.to_numeric(serie, errors='coerce')
+    es_numero = numericos.notna()
+    if es_numero.any():
+        resultado[es_numero] = pd.to_datetime(numericos[es_numero], unit='D', origin=ORIGEN_EXCEL)
+    pendientes = serie.notna() & ~es_numero
+    for formato in FORMATOS_FECHA:
+        if not pendientes.any():
+            break
+        convertidas = pd.to_datetime(serie[pendientes].astype(str).str.strip(), format=formato, errors='coerce')
+        resultado[convertidas.index] = resultado[convertidas.index].fillna(convertidas)
+        pendientes &= resultado.isna()
+    return resultado
+
+
+def convertir_entero(serie):
+    # Entero pequeño con nulos (Int8/Int16) si todos los valores son enteros;
+    # si hay decimales se usa float32
+    numeros = pd.to_numeric(serie, errors='coerce')
+    validos = numeros.dropna()
+    if len(validos) and not np.all(np.mod(validos, 1) == 0):
+        return numeros.astype('float32')
+    if validos.empty or (validos.min() >= -128 and validos.max() <= 127):
+        return numeros.astype('Int8')
+    if validos.min() >= -32768 and validos.max() <= 32767:
+        return numeros.astype('Int16')
+    return numeros.astype('Int64')
+
+
+def convertir_respuesta(serie):
+    # Las respuestas numéricas (cantidad de mandamientos) se guardan como entero
+    # pequeño; si vienen como texto, como categoría
+    numeros = pd.to_numeric(serie, errors='coerce')
+    if numeros.notna().sum() == serie.notna().sum():
+        return convertir_entero(serie)
+    return serie.astype('category')
+
+
+def aplicar_esquema(df, columnas_entero):
+    memoria_antes = int(df.memory_usage(deep=True).sum())
+    df = df.copy()
+    fallidas = {}
+
+    def registrar(columna, convertida):
+        filas = _filas_fallidas(df[columna], convertida)
+        if filas:
+            fallidas[columna] = filas
+        df[columna] = convertida
+
+    for columna in COLUMNAS_FECHA:
+        if columna in df:
+            registrar(columna, convertir_fecha(df[columna]))
+    for columna in columnas_entero:
+        if columna in df:
+            registrar(columna, convertir_entero(df[columna]))
+    for columna in COLUMNAS_DECIMAL:
+        if columna in df:
+            # Se mantiene en float64: en float32 los minutos se muestran con ruido decimal
+            registrar(columna, pd.to_numeric(df[columna], errors='coerce').astype('float64'))
+    if COLUMNA_CUMPLE in df:
+        registrar(COLUMNA_CUMPLE, convertir_respuesta(df[COLUMNA_CUMPLE]))
+    for columna in COLUMNAS_CATEGORIA:
+        if columna in df:
+            df[columna] = df[columna].astype('category')
+
+    memoria_despues = int(df.memory_usage(deep=True).sum())
+    informe = {
+        'filas_fallidas': fallidas,
+        'memoria_antes': memoria_antes,
+        'memoria_despues': memoria_despues,
+        'memoria_ahorrada': memoria_antes - memoria_despues,
+    }
+    for columna, filas in fallidas.items():
+        logger.warning("%d filas de '%s' no se pudieron convertir: %s", len(filas), columna, filas[:20])
+    logger.info(
+        "Esquema aplicado: %.1f KiB -> %.1f KiB (%.1f KiB ahorrados)",
+        memoria_antes / 1024, memoria_despues / 1024, informe['memoria_ahorrada'] / 1024
+    )
+    return df, informe
+
+
+def unir_informes(previo, informe, desplazamiento):
+    # Informe de una carga incremental: las filas fallidas del delta se numeran
+    # a continuación de las 'desplazamiento' filas previas y se suman a las que
+    # ya había; la memoria es la acumulada de todo lo que pasó por el esquema
+    if previo is None:
+        previo = {'filas_fallidas': {}, 'memoria_antes': 0, 'memoria_despues': 0, 'memoria_ahorrada': 0}
+    fallidas = {columna: list(filas) for columna, filas in previo['filas_fallidas'].items()}
+    for columna, filas in informe['filas_fallidas'].items():
+        fallidas.setdefault(columna, []).extend(desplazamiento + fila for fila in filas)
+    unido = {'filas_fallidas': fallidas}
+    for clave in ('memoria_antes', 'memoria_despues', 'memoria_ahorrada'):
+        unido[clave] = previo[clave] + informe[clave]
+    return unido
@@ -0,0 +1,76 @@
+import io
+import re
+import unicodedata
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Exportación de una tabla de sesiones por lotes: cada lote se convierte y se
+# escribe en la salida antes de pasar al siguiente, así que nunca se arma una
+# copia convertida de la tabla completa (el texto CSV entero o la tabla Arrow
+# entera). En Parquet cada lote es un row group
+
+FORMATOS = {'csv': 'CSV', 'parquet': 'Parquet'}
+MIME = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+# Filas por lote
+TAM_LOTE_EXPORTACION = 10_000
+
+
+def nombre_archivo(asesor):
+    # "Pérez Díaz, Ana" -> "perez_diaz_ana"
+    texto = unicodedata.normalize('NFKD', str(asesor)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_') or 'asesor'
+
+
+def lotes(df, tam_lote=TAM_LOTE_EXPORTACION):
+    # Con copy-on-write los slices no copian datos
+    for inicio in range(0, len(df), tam_lote):
+        yield df.iloc[inicio:inicio + tam_lote]
+
+
+def _escribir_csv(df, destino, tam_lote):
+    # utf-8-sig: Excel abre el CSV con las tildes correctas
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    try:
+        texto.write(df.iloc[:0].to_csv(index=False))
+        for lote in lotes(df, tam_lote):
+            lote.to_csv(texto, header=False, index=False)
+        texto.flush()
+    finally:
+        # Se suelta el destino sin cerrarlo; lo cierra quien lo abrió
+        texto.detach()
+
+
+def _esquema(df):
+    # Tipos de la tabla completa, fijos para todos los lotes. Una columna object
+    # vacía no dice su tipo; se toma del primer valor no nulo
+    esquema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            valores = df[campo.name].dropna()
+            if len(valores):
+                esquema = esquema.set(i, pa.field(campo.name, pa.array(valores.iloc[:1]).type))
+    return esquema
+
+
+def _escribir_parquet(df, destino, tam_lote):
+    esquema = _esquema(df)
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for lote in lotes(df, tam_lote):
+            escritor.write_table(pa.Table.from_pandas(lote, schema=esquema, preserve_index=False))
+
+
+def exportar(df, formato, destino=None, tam_lote=TAM_LOTE_EXPORTACION):
+    # Escribe df en 'destino' (archivo binario abierto); sin destino devuelve
+    # un buffer en memoria posicionado al inicio, listo para st.download_button
+    salida = io.BytesIO() if destino is None else destino
+    if formato == 'csv':
+        _escribir_csv(df, salida, tam_lote)
+    elif formato == 'parquet':
+        _escribir_parquet(df, salida, tam_lote)
+    else:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    if destino is None:
+        salida.seek(0)
+    return salida
@@ -0,0 +1,210 @@
+import argparse
+import datetime
+import logging
+import os
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Carpeta donde se generan los libros sintéticos, uno por tamaño:
+# sinteticos/<filas>/Entrenamiento_R3.xlsx
+DIR_SINTETICOS = 'sinteticos'
+ARCHIVO_SINTETICO = 'Entrenamiento_R3.xlsx'
+TAMANOS = [10_000, 100_000, 1_000_000]
+
+# Mismas columnas y en el mismo orden que Entrenamiento_R3.xlsx (incluida la
+# columna de comentarios repetida y vacía que trae la exportación del formulario)
+ENCABEZADO = [
+    'ID', 'Fecha de Inicio', 'Hora de Inicio', 'Fecha de Finalización', 'Hora de Finalización',
+    'Correo electrónico', 'Nombre', 'Hora de la última modificación', 'Evaluador', 'Asesor Evaluado',
+    'Teléfono de Llamada o Chat Evaluado', 'Herramienta Evaluada',
+    'Presentación', 'Nivel de Expertise en Presentación',
+    'Sondeo', 'Nivel de Expertise en Sondeo',
+    'Argumentación', 'Nivel de Expertise en Argumentación',
+    'Rebate', 'Nivel de Expertise en Rebate',
+    'Cierre', 'Nivel de Expertise en Cierre',
+    '¿Cumple los 6 Mandamientos de la Venta Carrión?', '¿Cuál o cuáles mandamientos NO cumple?',
+    'Detalles o Comentarios Adicionales', 'Duración de Capa', 'Fecha de Capa',
+    'Detalles o Comentarios Adicionales',
+]
+
+CRITERIOS = ['Presentación', 'Sondeo', 'Argumentación', 'Rebate', 'Cierre']
+
+# Distribuciones tomadas de Entrenamiento_R3.xlsx
+EVALUADORES = ['Jorge Vasquez', 'Jennifer Rossi', 'Renzo Ruiz', 'Aemee Lira', 'Amelia Poma', 'Brisa Moncada', 'Magaly Inga']
+PESOS_EVALUADORES = [62, 31, 29, 11, 10, 9, 2]
+HERRAMIENTAS = ['CCVOX', 'PCHAT']
+PESOS_HERRAMIENTAS = [96, 58]
+MANDAMIENTOS = [
+    'Sondeo', 'Conecta, Personaliza y Empatiza', 'Genera Urgencia con Emoción',
+    'Aterriza la decisión y comprometelo', 'Rebate con Estrategia', 'Felicita su Decisión',
+]
+# Probabilidad de no cumplir cada mandamiento
+PROB_MANDAMIENTOS = [0.25, 0.40, 0.40, 0.35, 0.30, 0.45]
+PESOS_CUMPLE = [33, 36, 28, 25, 27, 5]
+
+NOMBRES = ['Junior', 'Shirley', 'Stefano', 'Jaime', 'Jomayra', 'Lady', 'Kenyi', 'Diego', 'Henry', 'Joanna',
+           'Javier', 'Jean', 'Mabel', 'Joselyn', 'Patricia', 'Andrea', 'Rosa', 'Lucy', 'Dayanna', 'Katty',
+           'Marisol', 'Norelli', 'Jose', 'Jhonnatan', 'Luis', 'Carla', 'Miguel', 'Valeria', 'Renato', 'Sofia']
+APELLIDOS = ['Deza', 'Mejia', 'Rivera', 'Chura', 'Chaupis', 'Anampa', 'Aldave', 'Calderon', 'Camargo',
+             'Canchumanya', 'Chavez', 'Colfer', 'Gamonal', 'Garcia', 'Goicochea', 'Lizarazo', 'Lopez',
+             'Mujica', 'Paz', 'Ponce', 'Rafael', 'Tolentino', 'Vasquez', 'Quispe', 'Huamani', 'Torres',
+             'Solis', 'Velasquez', 'Guillen', 'Andrade']
+
+TEXTOS_CRITERIO = [
+    'na',
+    'na: no llega a esa instancia',
+    'Asesor no realiza preguntas de sondeo para saber el motivo por el cual le interesa la carrera',
+    'Asesor no brinda beneficios de la institución',
+    'En la llamada asesor rebate objeción del lugar donde realizar la matricula y cuotas',
+    'Indica cuales son los pasos para generar la matricula.',
+    'Saludo: no lo hace\nNombre: na\nVocabulario Positivo: na\nMotivo de Contacto: na\nGancho Inicial Potente: Na',
+    'CTA Claro : NA\nPróximo paso acordado : NA\nUrgencia destacada : NA\nResumen de valor : NA\nConfirmación de datos: NA',
+    'Asesor se presenta correctamente y genera un gancho inicial en la llamada',
+    'Realiza preguntas abiertas y personaliza la oferta según la respuesta del lead',
+]
+TEXTOS_COMENTARIO = [
+    'Puntos positivos\nAsesor genera urgencia indicando que la promoción es solo por hoy.',
+    'Asesor no responde al chat asignado a pesar que se encuentra dentro de su turno. El lead se cierra por falta de contacto.',
+    'Se recomienda reforzar el sondeo antes de argumentar.',
+    'Buen manejo de objeciones; falta confirmar datos al cierre.',
+    'Llamada corta, el lead corta antes de la presentación.',
+    'Oportunidades de mejora\nNo felicita la decisión del lead ni resume el valor del programa.',
+    '',
+]
+
+
+def _asesores(cantidad, rng):
+    # Nombres "Apellido Apellido, Nombre Nombre" únicos
+    nombres = set()
+    while len(nombres) < cantidad:
+        a1, a2 = rng.choice(APELLIDOS, 2)
+        n1, n2 = rng.choice(NOMBRES, 2)
+        nombres.add(f"{a1} {a2}, {n1} {n2}")
+    return sorted(nombres)
+
+
+def _elegir(rng, opciones, pesos, n):
+    pesos = np.asarray(pesos, dtype='float64')
+    return rng.choice(len(opciones), size=n, p=pesos / pesos.sum())
+
+
+def generar(filas, semilla=0):
+    # DataFrame con el esquema del Excel original. La cantidad de asesores y el
+    # periodo cubierto crecen con las filas; pocos asesores concentran muchas
+    # sesiones (pesos log-normales) y cada asesor tiene un nivel propio que
+    # mejora o empeora con el tiempo
+    rng = np.random.default_rng(semilla)
+    cantidad_asesores = min(2000, max(27, filas // 200))
+    asesores = _asesores(cantidad_asesores, rng)
+    pesos_asesores = rng.lognormal(0, 0.8, cantidad_asesores)
+    asesor = _elegir(rng, asesores, pesos_asesores, filas)
+
+    dias = max(30, min(3 * 365, filas // 100))
+    inicio_periodo = np.datetime64('2025-01-01')
+    fecha = inicio_periodo + rng.integers(0, dias, filas).astype('timedelta64[D]')
+    segundos_inicio = rng.integers(8 * 3600, 20 * 3600, filas)
+    duracion = np.round(rng.lognormal(np.log(10), 0.9, filas), 2)
+    duracion[rng.random(filas) < 0.005] = np.nan
+    segundos_fin = np.minimum(segundos_inicio + np.nan_to_num(duracion * 60).astype('int64'), 86399)
+
+    # Nivel base por asesor más una tendencia lineal a lo largo del periodo
+    nivel_base = rng.normal(3, 0.8, cantidad_asesores)
+    tendencia = rng.normal(0, 0.8, cantidad_asesores)
+    avance = (fecha - inicio_periodo).astype('int64') / dias
+    nivel = nivel_base[asesor] + tendencia[asesor] * (avance - 0.5)
+
+    df = pd.DataFrame({
+        'ID': np.arange(1, filas + 1),
+        'Fecha de Inicio': fecha,
+        'Hora de Inicio': segundos_inicio,
+        'Fecha de Finalización': fecha,
+        'Hora de Finalización': segundos_fin,
+        'Correo electrónico': 'anonymous',
+        'Nombre': None,
+        'Hora de la última modificación': None,
+        'Evaluador': np.asarray(EVALUADORES)[_elegir(rng, EVALUADORES, PESOS_EVALUADORES, filas)],
+        'Asesor Evaluado': np.asarray(asesores)[asesor],
+        'Teléfono de Llamada o Chat Evaluado': rng.integers(900_000_000, 999_999_999, filas),
+        'Herramienta Evaluada': np.asarray(HERRAMIENTAS)[_elegir(rng, HERRAMIENTAS, PESOS_HERRAMIENTAS, filas)],
+    })
+    textos = np.asarray(TEXTOS_CRITERIO, dtype=object)
+    for criterio in CRITERIOS:
+        df[criterio] = textos[rng.integers(0, len(textos), filas)]
+        df[f'Nivel de Expertise en {criterio}'] = np.clip(np.rint(nivel + rng.normal(0, 0.9, filas)), 1, 5).astype('int64')
+
+    df['¿Cumple los 6 Mandamientos de la Venta Carrión?'] = _elegir(rng, range(1, 7), PESOS_CUMPLE, filas) + 1
+    no_cumple = rng.random((filas, len(MANDAMIENTOS))) < np.asarray(PROB_MANDAMIENTOS)
+    # Cada combinación se arma una sola vez: hay 2^6 posibles
+    combinaciones = np.asarray([
+        ''.join(m + ';' for j, m in enumerate(MANDAMIENTOS) if codigo >> j & 1) or None
+        for codigo in range(1 << len(MANDAMIENTOS))
+    ], dtype=object)
+    codigos = no_cumple @ (1 << np.arange(len(MANDAMIENTOS)))
+    df['¿Cuál o cuáles mandamientos NO cumple?'] = combinaciones[codigos]
+    comentarios = np.asarray(TEXTOS_COMENTARIO, dtype=object)
+    df['Detalles o Comentarios Adicionales'] = comentarios[rng.integers(0, len(comentarios), filas)]
+    df['Duración de Capa'] = duracion
+    df['Fecha de Capa'] = fecha
+    return df
+
+
+def _segundos_a_hora(segundos):
+    return [datetime.time(s // 3600, s % 3600 // 60, s % 60) for s in segundos.tolist()]
+
+
+def escribir_excel(df, ruta):
+    # openpyxl en modo solo escritura: las filas se vuelcan al archivo a medida
+    # que se agregan, sin armar el libro completo en memoria
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(ENCABEZADO)
+    columnas = []
+    for nombre in ENCABEZADO[:-1]:
+        serie = df[nombre]
+        if nombre in ('Hora de Inicio', 'Hora de Finalización'):
+            columnas.append(_segundos_a_hora(serie.to_numpy()))
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            columnas.append(serie.dt.to_pydatetime().tolist())
+        else:
+            columnas.append(serie.astype(object).where(serie.notna(), None).tolist())
+    for fila in zip(*columnas):
+        hoja.append(list(fila) + [None])
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    libro.save(ruta)
+
+
+def ruta_sintetico(filas, carpeta=DIR_SINTETICOS):
+    return os.path.join(carpeta, str(filas), ARCHIVO_SINTETICO)
+
+
+def generar_archivo(filas, carpeta=DIR_SINTETICOS, semilla=0, forzar=False):
+    ruta = ruta_sintetico(filas, carpeta)
+    if os.path.exists(ruta) and not forzar:
+        return ruta
+    inicio = time.perf_counter()
+    escribir_excel(generar(filas, semilla), ruta)
+    logger.info("Generado %s (%d filas) en %.1f s", ruta, filas, time.perf_counter() - inicio)
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera libros Excel sintéticos con el esquema de Entrenamiento_R3.xlsx")
+    parser.add_argument('--filas', type=int, nargs='+', default=TAMANOS)
+    parser.add_argument('--carpeta', default=DIR_SINTETICOS)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--forzar', action='store_true', help="Regenera aunque el archivo ya exista")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for filas in args.filas:
+        print(generar_archivo(filas, args.carpeta, args.semilla, args.forzar))
+
+
+if __name__ == '__main__':
+    main()
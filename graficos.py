@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Cantidad máxima de figuras guardadas en memoria por proceso
+MAX_FIGURAS = 256
+
+# Por encima de esta cantidad de puntos, las líneas de puntaje se agrupan por
+# semana o mes en el servidor y se dibujan con WebGL
+UMBRAL_PUNTOS = 2000
+
+
+class CacheFiguras:
+    # Caché LRU de figuras de Plotly compartida por todas las sesiones. Guarda el
+    # JSON de la figura, así cada sesión recibe su propio objeto y ninguna puede
+    # modificar la copia de las demás.
+    # La clave debe identificar todo lo que define el gráfico, por ejemplo
+    # (script, gráfico, asesor, rango de fechas, versión de datos).
+
+    def __init__(self, maximo=MAX_FIGURAS):
+        self.maximo = maximo
+        self.aciertos = 0
+        self.fallos = 0
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            json_figura = self._figuras.get(clave)
+            if json_figura is not None:
+                self._figuras.move_to_end(clave)
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+        if json_figura is None:
+            # Se construye fuera del lock para no bloquear a las otras sesiones
+            json_figura = construir().to_json()
+            with self._lock:
+                self._figuras[clave] = json_figura
+                self._figuras.move_to_end(clave)
+                while len(self._figuras) > self.maximo:
+                    self._figuras.popitem(last=False)
+        return pio.from_json(json_figura)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'figuras': len(self._figuras),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+            }
+
+    def limpiar(self):
+        with self._lock:
+            self._figuras.clear()
+
+
+cache_figuras = CacheFiguras()
+
+
+def _agrupar_por_periodo(df, x, y, color, umbral):
+    # Semanal si entra en el umbral, si no mensual: media, mínimo y máximo por periodo
+    series = df[color].nunique() if color else 1
+    fechas = df[x]
+    semanas = (fechas.max() - fechas.min()).days / 7 + 1
+    frecuencia = 'W' if semanas * series <= umbral else 'M'
+    claves = ([df[color]] if color else []) + [fechas.dt.to_period(frecuencia).dt.start_time.rename(x)]
+    agrupado = df.groupby(claves, observed=True, sort=True)[y].agg(['mean', 'min', 'max']).reset_index()
+    return agrupado, frecuencia
+
+
+def linea_puntajes(df, x, y, color=None, umbral=UMBRAL_PUNTOS, **kwargs):
+    # Por debajo del umbral es el px.line exacto de siempre (un punto por sesión).
+    # Por encima, cada serie se resume por periodo: línea de la media y una
+    # banda entre el mínimo y el máximo, con trazas Scattergl
+    datos = df.dropna(subset=[x, y])
+    if len(datos) <= umbral:
+        return px.line(df, x=x, y=y, color=color, **kwargs)
+
+    agrupado, frecuencia = _agrupar_por_periodo(datos, x, y, color, umbral)
+    etiquetas = kwargs.get('labels') or {}
+    colores = kwargs.get('color_discrete_sequence') or px.colors.qualitative.Plotly
+    nombre_periodo = 'semanal' if frecuencia == 'W' else 'mensual'
+    fig = go.Figure()
+    grupos = agrupado.groupby(color, observed=True, sort=False) if color else [(y, agrupado)]
+    for i, (serie, puntos) in enumerate(grupos):
+        tono = colores[i % len(colores)]
+        fig.add_trace(go.Scattergl(
+            x=puntos[x], y=puntos['max'], mode='lines', line=dict(width=0, color=tono),
+            legendgroup=str(serie), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scattergl(
+            x=puntos[x], y=puntos['min'], mode='lines', line=dict(width=0, color=tono),
+            fill='tonexty', opacity=0.25, legendgroup=str(serie), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scattergl(
+            x=puntos[x], y=puntos['mean'], mode='lines+markers', line=dict(color=tono),
+            name=str(serie), legendgroup=str(serie), showlegend=bool(color)
+        ))
+    titulo = kwargs.get('title')
+    fig.update_layout(
+        title=f"{titulo} (media {nombre_periodo}, banda mín-máx)" if titulo else None,
+        xaxis_title=etiquetas.get(x, x),
+        yaxis_title=etiquetas.get(y, y),
+        legend_title_text=etiquetas.get(color, color) if color else None,
+    )
+    return fig
+
+
+def agregar_tendencia(fig, x, y, nombre, color=None, umbral=UMBRAL_PUNTOS):
+    # Línea suavizada (media móvil, ver TendenciasAsesores) sobre un gráfico de
+    # puntajes; con muchos puntos se dibuja con WebGL, como linea_puntajes
+    traza = go.Scattergl if len(x) > umbral else go.Scatter
+    fig.add_trace(traza(x=x, y=y, mode='lines', name=nombre, line=dict(color=color, width=3)))
+    return fig
@@ -0,0 +1,338 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceAsesores:
+    # Tabla ordenada por asesor y fecha, con el rango contiguo de filas de cada
+    # asesor. Seleccionar un asesor es un slice y filtrar por fechas una búsqueda
+    # binaria dentro de ese slice, sin recorrer la tabla completa en cada rerun.
+
+    def __init__(self, df, col_asesor='Asesor Evaluado', col_fecha='Fecha de Capa', ordenada=False):
+        self.col_asesor = col_asesor
+        self.col_fecha = col_fecha
+        if ordenada:
+            self.tabla = df
+        else:
+            # mergesort es estable: las sesiones del mismo día conservan el orden del Excel
+            self.tabla = _ordenar(df, col_asesor, col_fecha)
+        self._fechas = self.tabla[col_fecha].to_numpy()
+        self.rangos = self._calcular_rangos(self.tabla[col_asesor])
+
+    @staticmethod
+    def _calcular_rangos(asesores):
+        # Los asesores nulos quedan al final y no forman parte del índice
+        n = int(asesores.notna().sum())
+        valores = asesores.to_numpy()[:n]
+        if n == 0:
+            return {}
+        # Con categorías basta comparar los códigos enteros
+        claves = asesores.cat.codes.to_numpy()[:n] if isinstance(asesores.dtype, pd.CategoricalDtype) else valores
+        cortes = np.flatnonzero(claves[1:] != claves[:-1]) + 1
+        inicios = np.concatenate(([0], cortes))
+        fines = np.concatenate((cortes, [n]))
+        return {valores[i]: (int(i), int(f)) for i, f in zip(inicios, fines)}
+
+    def asesores(self):
+        return list(self.rangos)
+
+    def sesiones_por_asesor(self):
+        return pd.Series(
+            [fin - inicio for inicio, fin in self.rangos.values()],
+            index=pd.Index(list(self.rangos), name=self.col_asesor)
+        )
+
+    def rango(self, asesor, desde=None, hasta=None):
+        base, tope = self.rangos.get(asesor, (0, 0))
+        fechas = self._fechas[base:tope]
+        # Las fechas nulas quedan al final de cada asesor, igual que con sort_values
+        desde, hasta = limites_dias(desde, hasta)
+        i = 0 if desde is None else int(np.searchsorted(fechas, np.datetime64(desde), side='left'))
+        j = len(fechas) if hasta is None else int(np.searchsorted(fechas, np.datetime64(hasta), side='left'))
+        return base + i, base + max(i, j)
+
+    def sesiones(self, asesor, desde=None, hasta=None):
+        inicio, fin = self.rango(asesor, desde, hasta)
+        return self.tabla.iloc[inicio:fin]
+
+    def sesiones_varios(self, asesores, desde=None, hasta=None):
+        # Sesiones de varios asesores en una sola selección: se juntan sus rangos
+        # de filas y se toman de una vez, en el orden de la tabla. El índice del
+        # resultado es la posición de cada fila en la tabla
+        rangos = sorted(self.rango(asesor, desde, hasta) for asesor in dict.fromkeys(asesores))
+        posiciones = np.concatenate([np.arange(inicio, fin) for inicio, fin in rangos] + [np.array([], dtype='int64')])
+        return self.tabla.iloc[posiciones]
+
+    def con_cambios(self, quitar, agregar):
+        # Índice nuevo sin las filas en las posiciones 'quitar' y con las filas de
+        # 'agregar' insertadas en su lugar, sin volver a ordenar la tabla completa.
+        # También devuelve la máscara de filas conservadas y la permutación usada,
+        # para que las estructuras alineadas con la tabla repitan el mismo cambio
+        conservar = np.ones(len(self.tabla), dtype=bool)
+        conservar[quitar] = False
+        base = self.tabla[conservar].reset_index(drop=True)
+        base, agregar = _unificar_categorias(base, agregar)
+        # 'permutacion' lleva del orden recibido al orden por asesor y fecha
+        permutacion = agregar.reset_index(drop=True).sort_values(
+            [self.col_asesor, self.col_fecha], kind='mergesort', na_position='last'
+        ).index.to_numpy()
+        agregar = agregar.take(permutacion).reset_index(drop=True)
+
+        rangos = self._calcular_rangos(base[self.col_asesor])
+        nombres = list(rangos)
+        n_validos = rangos[nombres[-1]][1] if nombres else 0
+        fechas_base = base[self.col_fecha].to_numpy()
+        fechas_nuevas = agregar[self.col_fecha].to_numpy()
+        posiciones = np.empty(len(agregar), dtype=np.int64)
+        grupos = agregar.groupby(self.col_asesor, dropna=False, observed=True, sort=False).indices
+        for asesor, filas in grupos.items():
+            if pd.isna(asesor):
+                posiciones[filas] = len(base)
+            elif asesor in rangos:
+                inicio, fin = rangos[asesor]
+                posiciones[filas] = inicio + np.searchsorted(fechas_base[inicio:fin], fechas_nuevas[filas], side='right')
+            else:
+                # Asesor nuevo: va antes del primer asesor que lo sigue en orden
+                siguiente = bisect.bisect_right(nombres, asesor)
+                posiciones[filas] = rangos[nombres[siguiente]][0] if siguiente < len(nombres) else n_validos
+        orden = np.insert(np.arange(len(base)), posiciones, np.arange(len(base), len(base) + len(agregar)))
+        tabla = pd.concat([base, agregar], ignore_index=True).take(orden).reset_index(drop=True)
+        # La permutación devuelta se refiere a las filas agregadas en el orden recibido
+        nuevas = orden >= len(base)
+        orden[nuevas] = len(base) + permutacion[orden[nuevas] - len(base)]
+        return IndiceAsesores(tabla, self.col_asesor, self.col_fecha, ordenada=True), conservar, orden
+
+
+def limites_dias(desde, hasta):
+    # Rango de días completos [desde, hasta] como límites [inicio, fin) para
+    # fechas con hora: una sesión del último día a las 15:00 queda dentro,
+    # igual que en el cubo, que agrupa por día
+    inicio = None if desde is None else pd.Timestamp(desde).normalize()
+    fin = None if hasta is None else pd.Timestamp(hasta).normalize() + pd.Timedelta(days=1)
+    return inicio, fin
+
+
+def _ordenar(df, col_asesor, col_fecha):
+    return df.sort_values([col_asesor, col_fecha], kind='mergesort', na_position='last').reset_index(drop=True)
+
+
+def _unificar_categorias(a, b):
+    # Para concatenar sin perder el tipo categórico, ambas tablas deben tener las
+    # mismas categorías; se usan ordenadas para que el orden siga siendo alfabético
+    a = a.copy(deep=False)
+    b = b.copy(deep=False)
+    for columna in a.columns.intersection(b.columns):
+        tipo_a, tipo_b = a[columna].dtype, b[columna].dtype
+        if isinstance(tipo_a, pd.CategoricalDtype) and isinstance(tipo_b, pd.CategoricalDtype):
+            if not tipo_a.categories.equals(tipo_b.categories):
+                categorias = sorted(set(tipo_a.categories) | set(tipo_b.categories))
+                a[columna] = a[columna].cat.set_categories(categorias)
+                b[columna] = b[columna].cat.set_categories(categorias)
+    return a, b
+
+
+def separar_mandamientos(texto):
+    # Las respuestas de selección múltiple vienen separadas por ';' (con un ';'
+    # final); la coma es parte de nombres como "Conecta, Personaliza y Empatiza"
+    if not isinstance(texto, str):
+        return []
+    return [' '.join(parte.split()) for parte in texto.split(';') if parte.strip()]
+
+
+class MatrizMandamientos:
+    # Matriz sesión x mandamiento no cumplido, empaquetada en bits y alineada
+    # fila a fila con la tabla del IndiceAsesores. Las frecuencias de cualquier
+    # rango de filas (asesor, asesor + fechas, organización) son sumas por columna.
+
+    def __init__(self, serie):
+        # casefold del mandamiento -> columna; el mismo mandamiento escrito con
+        # otras mayúsculas comparte columna
+        self._columnas = {}
+        self.vocabulario = []
+        self._bits = np.packbits(self._matriz(serie), axis=1)
+
+    def _matriz(self, serie):
+        # Amplía el vocabulario con los mandamientos nuevos que aparezcan
+        filas = []
+        for texto in serie:
+            posiciones = []
+            for mandamiento in separar_mandamientos(texto):
+                clave = mandamiento.casefold()
+                if clave not in self._columnas:
+                    self._columnas[clave] = len(self.vocabulario)
+                    self.vocabulario.append(mandamiento)
+                posiciones.append(self._columnas[clave])
+            filas.append(posiciones)
+        matriz = np.zeros((len(filas), len(self.vocabulario)), dtype=bool)
+        for i, posiciones in enumerate(filas):
+            matriz[i, posiciones] = True
+        return matriz
+
+    def _desempaquetar(self, inicio=0, fin=None):
+        return np.unpackbits(self._bits[inicio:fin], axis=1, count=len(self.vocabulario))
+
+    def conteos(self, inicio=0, fin=None):
+        return self._desempaquetar(inicio, fin).sum(axis=0, dtype='int64')
+
+    def frecuencias(self, inicio=0, fin=None):
+        tabla = pd.DataFrame({'Mandamiento': self.vocabulario, 'Frecuencia': self.conteos(inicio, fin)})
+        tabla = tabla[tabla['Frecuencia'] > 0]
+        return tabla.sort_values('Frecuencia', ascending=False, kind='mergesort').reset_index(drop=True)
+
+    def por_asesor(self, indice):
+        # Conteos de todos los asesores en una pasada, con los rangos del índice
+        asesores = indice.asesores()
+        if not asesores or not self.vocabulario:
+            return pd.DataFrame(0, index=pd.Index(asesores, name=indice.col_asesor), columns=self.vocabulario)
+        inicios = np.array([indice.rangos[a][0] for a in asesores])
+        fin = indice.rangos[asesores[-1]][1]
+        conteos = np.add.reduceat(self._desempaquetar(0, fin).astype('int64'), inicios, axis=0)
+        return pd.DataFrame(conteos, index=pd.Index(asesores, name=indice.col_asesor), columns=self.vocabulario)
+
+    def con_cambios(self, conservar, orden, serie):
+        # Misma operación que IndiceAsesores.con_cambios: solo se parsean las
+        # respuestas de las filas agregadas
+        nueva = MatrizMandamientos.__new__(MatrizMandamientos)
+        nueva._columnas = dict(self._columnas)
+        nueva.vocabulario = list(self.vocabulario)
+        agregadas = nueva._matriz(serie)
+        anteriores = self._desempaquetar()[conservar].astype(bool)
+        if anteriores.shape[1] < len(nueva.vocabulario):
+            anteriores = np.pad(anteriores, ((0, 0), (0, len(nueva.vocabulario) - anteriores.shape[1])))
+        nueva._bits = np.packbits(np.vstack([anteriores, agregadas])[orden], axis=1)
+        return nueva
+
+
+# Marcas diacríticas que quedan separadas de la letra tras la normalización NFKD
+DIACRITICOS = '[\u0300-\u036f]'
+PATRON_PALABRA = r'[^\W_]+'
+
+
+def normalizar_texto(serie):
+    # Minúsculas y sin tildes ni diéresis: "Objeción" y "objecion" son el mismo
+    # término (la ñ queda como n)
+    texto = serie.astype('string').str.normalize('NFKD')
+    return texto.str.replace(DIACRITICOS, '', regex=True).str.lower()
+
+
+def tokenizar(serie):
+    # Palabras de cada texto normalizado, una por aparición, con la posición del
+    # texto en la serie. Los textos repetidos (notas como "Bien") se tokenizan
+    # una sola vez
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    tokens = normalizar_texto(pd.Series(unicos, dtype=object)).str.findall(PATRON_PALABRA).explode().dropna()
+    de_unico = tokens.index.to_numpy(dtype='int64')
+    tokens = tokens.to_numpy(dtype=object)
+    por_unico = np.bincount(de_unico, minlength=len(unicos))
+    inicio_unico = np.concatenate(([0], np.cumsum(por_unico)[:-1])) if len(unicos) else por_unico
+    filas = np.flatnonzero(codigos >= 0)
+    repeticiones = por_unico[codigos[filas]]
+    # Posición en 'tokens' de cada aparición: inicio de su texto + orden dentro de él
+    desplazamiento = inicio_unico[codigos[filas]] - (np.cumsum(repeticiones) - repeticiones)
+    posiciones = np.repeat(desplazamiento, repeticiones) + np.arange(int(repeticiones.sum()))
+    return tokens[posiciones], np.repeat(filas, repeticiones).astype('int64')
+
+
+def terminos(consulta):
+    # La misma normalización que normalizar_texto, sin pasar por pandas
+    texto = re.sub(DIACRITICOS, '', unicodedata.normalize('NFKD', str(consulta))).lower()
+    return list(dict.fromkeys(re.findall(PATRON_PALABRA, texto)))
+
+
+def _unir_filas(filas, mascaras):
+    # Una entrada por fila, ordenadas, con las columnas de todas sus apariciones
+    if len(filas) == 0:
+        return filas.astype('int64'), mascaras.astype('uint8')
+    orden = np.argsort(filas)
+    filas, mascaras = filas[orden], mascaras[orden]
+    inicios = np.flatnonzero(np.concatenate(([True], filas[1:] != filas[:-1])))
+    return filas[inicios], np.bitwise_or.reduceat(mascaras, inicios)
+
+
+def intersectar(resultados):
+    # Filas que contienen todos los términos (cada resultado es (filas, máscaras)
+    # ordenado por fila); las máscaras se combinan
+    filas, mascaras = resultados[0]
+    for otras_filas, otras_mascaras in resultados[1:]:
+        filas, i, j = np.intersect1d(filas, otras_filas, assume_unique=True, return_indices=True)
+        mascaras = mascaras[i] | otras_mascaras[j]
+    return filas, mascaras
+
+
+class IndiceTexto:
+    # Índice invertido de las columnas de texto libre, alineado fila a fila con
+    # la tabla del IndiceAsesores: para cada término normalizado, las filas donde
+    # aparece y una máscara de bits con las columnas que lo contienen. El
+    # vocabulario está ordenado, así que un término es una búsqueda binaria y un
+    # prefijo ("objeci") un rango contiguo del vocabulario.
+
+    def __init__(self, df, columnas):
+        self.columnas = [c for c in columnas if c in df]
+        tokens, filas, mascaras = self._postings(df)
+        self._construir(tokens, filas, mascaras, len(df))
+
+    def _postings(self, df):
+        partes = [tokenizar(df[columna]) + (1 << k,) for k, columna in enumerate(self.columnas)]
+        if not partes:
+            return np.array([], dtype=object), np.array([], dtype='int64'), np.array([], dtype='uint8')
+        return (
+            np.concatenate([tokens for tokens, _, _ in partes]),
+            np.concatenate([filas for _, filas, _ in partes]),
+            np.concatenate([np.full(len(filas), bit, dtype='uint8') for _, filas, bit in partes]),
+        )
+
+    def _construir(self, tokens, filas, mascaras, n_filas):
+        codigos, vocabulario = pd.factorize(tokens, sort=True)
+        # Clave término + fila: al ordenarla quedan las listas de cada término
+        # una tras otra, con las filas en orden
+        claves = codigos.astype('int64') * max(n_filas, 1) + filas
+        claves, mascaras = _unir_filas(claves, mascaras)
+        self.vocabulario = np.array(vocabulario, dtype=str)
+        self.filas = claves % max(n_filas, 1)
+        self.mascaras = mascaras
+        self.inicios = np.searchsorted(claves // max(n_filas, 1), np.arange(len(self.vocabulario) + 1))
+
+    def coincidencias(self, termino):
+        # Filas con algún término que empieza por 'termino'
+        desde = int(np.searchsorted(self.vocabulario, termino, side='left'))
+        hasta = int(np.searchsorted(self.vocabulario, termino + '\U0010ffff', side='left'))
+        inicio, fin = self.inicios[desde], self.inicios[hasta]
+        filas, mascaras = self.filas[inicio:fin], self.mascaras[inicio:fin]
+        if hasta - desde > 1:
+            filas, mascaras = _unir_filas(filas, mascaras)
+        return filas, mascaras
+
+    def buscar(self, consulta):
+        # Filas (ordenadas) que contienen todos los términos de la consulta y en
+        # qué columnas aparecen
+        lista = terminos(consulta)
+        if not lista:
+            return np.array([], dtype='int64'), np.array([], dtype='uint8')
+        return intersectar([self.coincidencias(termino) for termino in lista])
+
+    def etiquetas(self, mascaras):
+        return [", ".join(c for k, c in enumerate(self.columnas) if m >> k & 1) for m in mascaras]
+
+    def con_cambios(self, conservar, orden, df):
+        # Misma operación que IndiceAsesores.con_cambios: solo se tokenizan las
+        # filas agregadas (df, en el orden recibido); las demás conservan sus
+        # listas con la fila renumerada
+        nuevo = IndiceTexto.__new__(IndiceTexto)
+        nuevo.columnas = self.columnas
+        n_base = int(conservar.sum())
+        destino = np.empty(len(orden), dtype='int64')
+        destino[orden] = np.arange(len(orden))
+        base = np.cumsum(conservar) - 1
+        tokens = np.repeat(self.vocabulario.astype(object), np.diff(self.inicios))
+        quedan = conservar[self.filas]
+        tokens_nuevos, filas_nuevas, mascaras_nuevas = nuevo._postings(df)
+        nuevo._construir(
+            np.concatenate([tokens[quedan], tokens_nuevos]),
+            np.concatenate([destino[base[self.filas[quedan]]], destino[n_base + filas_nuevas]]),
+            np.concatenate([self.mascaras[quedan], mascaras_nuevas]),
+            len(orden)
+        )
+        return nuevo
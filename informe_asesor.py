@@ -0,0 +1,55 @@
+import plotly.express as px
+
+# Piezas del informe por asesor (main (10).py / main (11).py) que también usa
+# el generador de reportes en lote (reporte_lote.py)
+
+PLANTILLA = 'plotly_white'
+
+# (etiqueta, columna) del detalle por sesión, en el orden en que se muestran
+CAMPOS_DETALLE = [
+    ('Presentación', 'Presentación'),
+    ('Nivel de Expertise en Presentación', 'Nivel de Expertise en Presentación'),
+    ('Sondeo', 'Sondeo'),
+    ('Nivel de Expertise en Sondeo', 'Nivel de Expertise en Sondeo'),
+    ('Argumentación', 'Argumentación'),
+    ('Nivel de Expertise en Argumentación', 'Nivel de Expertise en Argumentación'),
+    ('Rebate', 'Rebate'),
+    ('Nivel de Expertise en Rebate', 'Nivel de Expertise en Rebate'),
+    ('Cierre', 'Cierre'),
+    ('Nivel de Expertise en Cierre', 'Nivel de Expertise en Cierre'),
+    ('¿Cumple los 6 Mandamientos de la Venta Carrión?', '¿Cumple los 6 Mandamientos de la Venta Carrión?'),
+    ('¿Cuál o cuáles mandamientos NO cumple?', '¿Cuál o cuáles mandamientos NO cumple?'),
+    ('Detalles o Comentarios Adicionales', 'Detalles o Comentarios Adicionales'),
+]
+
+
+def figura_sesiones(por_fecha):
+    # por_fecha: filas de CuboSesiones.serie()
+    return px.bar(
+        por_fecha.rename(columns={'sesiones': 'Cantidad de Sesiones'}),
+        x='Fecha de Capa',
+        y='Cantidad de Sesiones',
+        title="Número de Sesiones por Fecha",
+        labels={'Cantidad de Sesiones': 'Cantidad', 'Fecha de Capa': 'Fecha'},
+        template=PLANTILLA
+    )
+
+
+def figura_duracion(por_fecha):
+    return px.bar(
+        por_fecha.rename(columns={'duracion_total': 'Duración de Capa'}),
+        x='Fecha de Capa',
+        y='Duración de Capa',
+        title="Duración Total de Sesiones por Fecha (minutos)",
+        labels={'Duración de Capa': 'Duración (min)', 'Fecha de Capa': 'Fecha'},
+        template=PLANTILLA
+    )
+
+
+def tabla_evaluadores(df_asesor):
+    tabla = df_asesor[['Fecha de Capa', 'Evaluador', 'Duración de Capa']].copy()
+    tabla['Fecha de Capa'] = tabla['Fecha de Capa'].dt.strftime('%d-%m-%Y')
+    return tabla.rename(columns={
+        'Fecha de Capa': 'Fecha de Capacitación',
+        'Duración de Capa': 'Duración (minutos)'
+    }).reset_index(drop=True)
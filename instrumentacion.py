@@ -0,0 +1,129 @@
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+
+from graficos import cache_figuras
+
+# La medición se activa con la variable de entorno DASHBOARD_TIEMPOS=1 (todas
+# las sesiones) o agregando ?tiempos=1 a la URL (solo esa sesión)
+VARIABLE_ENTORNO = 'DASHBOARD_TIEMPOS'
+PARAMETRO_URL = 'tiempos'
+VALORES_ACTIVOS = {'1', 'true', 'si', 'sí', 'on'}
+
+# Un registro JSON por rerun, para analizar después fuera del dashboard
+ARCHIVO_LOG = os.environ.get('DASHBOARD_TIEMPOS_LOG', 'tiempos_reruns.jsonl')
+
+_lock_log = threading.Lock()
+
+
+def medicion_activada():
+    if os.environ.get(VARIABLE_ENTORNO, '').strip().lower() in VALORES_ACTIVOS:
+        return True
+    return str(st.query_params.get(PARAMETRO_URL, '')).strip().lower() in VALORES_ACTIVOS
+
+
+class Medicion:
+    # Tiempos de las etapas de un rerun. Desactivada, etapa() no mide nada y
+    # cerrar() no muestra ni escribe nada
+
+    def __init__(self, script, activa):
+        self.script = script
+        self.activa = activa
+        self.etapas = {}
+        self._inicio = time.perf_counter()
+        self._cerrada = False
+
+    @contextmanager
+    def etapa(self, nombre):
+        if not self.activa:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Una etapa que se repite en el rerun (varios gráficos) se acumula
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    @contextmanager
+    def fragmento(self, nombre, **contexto):
+        # Cuerpo de un st.fragment. En el rerun completo no mide nada aparte: sus
+        # etapas se suman a las del rerun. Cuando se vuelve a ejecutar solo el
+        # fragmento la medición ya está cerrada, así que se registra por separado
+        # y el tiempo se muestra debajo del fragmento (no puede escribir en la
+        # barra lateral)
+        if not self.activa or not self._cerrada:
+            yield
+            return
+        self.etapas = {}
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - inicio
+            _escribir_registro({
+                **self._encabezado(),
+                **contexto,
+                'fragmento': nombre,
+                'etapas_ms': {etapa: round(segundos * 1000, 2) for etapa, segundos in self.etapas.items()},
+                'total_ms': round(total * 1000, 2),
+                'cache_figuras': cache_figuras.estadisticas(),
+            })
+            st.caption(f"⏱️ Rerun del fragmento '{nombre}': {total * 1000:.1f} ms")
+
+    def _encabezado(self):
+        return {
+            'fecha': datetime.datetime.now().isoformat(timespec='milliseconds'),
+            'script': self.script,
+            'sesion': st.session_state.setdefault('_id_sesion_tiempos', uuid.uuid4().hex[:8]),
+        }
+
+    def cerrar(self, **contexto):
+        # Se llama al final del script (o antes de un st.stop): muestra el panel
+        # en la barra lateral y agrega el registro al log
+        if not self.activa or self._cerrada:
+            return
+        self._cerrada = True
+        total = time.perf_counter() - self._inicio
+        etapas = dict(self.etapas)
+        etapas['render y otros'] = max(0.0, total - sum(self.etapas.values()))
+        registro = {
+            **self._encabezado(),
+            **contexto,
+            'etapas_ms': {nombre: round(segundos * 1000, 2) for nombre, segundos in etapas.items()},
+            'total_ms': round(total * 1000, 2),
+            # Acumulados del proceso: la caché es compartida por todas las sesiones
+            'cache_figuras': cache_figuras.estadisticas(),
+        }
+        _escribir_registro(registro)
+        self._mostrar_panel(etapas, total, registro['cache_figuras'])
+
+    def _mostrar_panel(self, etapas, total, cache):
+        filas = "\n".join(
+            f"| {nombre} | {segundos * 1000:.1f} | {segundos / total * 100 if total else 0:.0f}% |"
+            for nombre, segundos in etapas.items()
+        )
+        with st.sidebar.expander("⏱️ Tiempos de este rerun", expanded=True):
+            st.markdown(f"| Etapa | ms | % |\n|---|---:|---:|\n{filas}\n| **Total** | **{total * 1000:.1f}** | |")
+            st.caption(
+                f"Caché de figuras (proceso): {cache['figuras']} figuras, {cache['aciertos']} aciertos, "
+                f"{cache['fallos']} fallos ({cache['tasa_aciertos']:.0%} de aciertos)"
+            )
+            st.caption(f"Registro agregado a {ARCHIVO_LOG}")
+
+
+def _escribir_registro(registro):
+    linea = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+    with _lock_log:
+        with open(ARCHIVO_LOG, 'a', encoding='utf-8') as f:
+            f.write(linea)
+
+
+def iniciar_medicion(script):
+    return Medicion(script, medicion_activada())
@@ -1,41 +1,61 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+import os
+
+from agregados import FRECUENCIAS
+from datos import LIBROS, obtener_conjunto
+from graficos import cache_figuras
+from informe_asesor import CAMPOS_DETALLE, figura_duracion, figura_sesiones, tabla_evaluadores
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+from vistas import mostrar_detalle_sesiones
 
 # Configuración página
 st.set_page_config(page_title="Dashboard Capacitación", layout="wide")
 
-@st.cache_data
-def cargar_datos():
-    df = pd.read_excel('/mnt/data/Entrenamiento_R3.xlsx')
-    df['Fecha de Capa'] = pd.to_datetime(df['Fecha de Capa'], errors='coerce')
-    return df
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
+
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
+
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'Evaluador', 'Fecha de Capa', 'Duración de Capa',
+    'Presentación', 'Nivel de Expertise en Presentación',
+    'Sondeo', 'Nivel de Expertise en Sondeo',
+    'Argumentación', 'Nivel de Expertise en Argumentación',
+    'Rebate', 'Nivel de Expertise en Rebate',
+    'Cierre', 'Nivel de Expertise en Cierre',
+    '¿Cumple los 6 Mandamientos de la Venta Carrión?',
+    '¿Cuál o cuáles mandamientos NO cumple?',
+    'Detalles o Comentarios Adicionales'
+]
 
-def mostrar_valor(valor):
-    if pd.isna(valor):
-        return "No disponible"
-    if isinstance(valor, str) and valor.strip() == '':
-        return "No disponible"
-    return valor
+# Sesiones que se listan como máximo en los resultados de la búsqueda
+LIMITE_BUSQUEDA = 200
 
-df = cargar_datos()
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(LIBROS, COLUMNAS)
 
 st.title("📋 Informe de Capacitación por Asesor Evaluado")
 
 # Selector de asesor evaluado
-asesores = df['Asesor Evaluado'].dropna().unique()
-asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", sorted(asesores))
+asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", conjunto.indice.asesores())
 
 # Filtrar datos del asesor seleccionado
-df_asesor = df[df['Asesor Evaluado'] == asesor_seleccionado].sort_values('Fecha de Capa')
+with medicion.etapa('filtro'):
+    df_asesor = conjunto.indice.sesiones(asesor_seleccionado)
 
 if df_asesor.empty:
     st.warning("⚠️ No hay datos para el asesor seleccionado.")
 else:
     # --- Resumen general y métricas ---
-    total_sesiones = len(df_asesor)
-    duracion_total = df_asesor['Duración de Capa'].sum()
-    duracion_media = df_asesor['Duración de Capa'].mean()
+    with medicion.etapa('agregado'):
+        resumen = conjunto.cubo.resumen(asesor_seleccionado)
+    total_sesiones = resumen['sesiones']
+    duracion_total = resumen['duracion_total']
+    duracion_media = resumen['duracion_media']
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Sesiones Totales", total_sesiones)
@@ -44,66 +64,78 @@ else:
 
     st.markdown("---")
 
-    # --- Gráfico: Sesiones por fecha ---
-    sesiones_por_fecha = df_asesor.groupby('Fecha de Capa').size().reset_index(name='Cantidad de Sesiones')
-    fig_sesiones = px.bar(
-        sesiones_por_fecha,
-        x='Fecha de Capa',
-        y='Cantidad de Sesiones',
-        title="Número de Sesiones por Fecha",
-        labels={'Cantidad de Sesiones': 'Cantidad', 'Fecha de Capa': 'Fecha'},
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_sesiones, use_container_width=True)
-
-    # --- Gráfico: Duración total por fecha ---
-    duracion_por_fecha = df_asesor.groupby('Fecha de Capa')['Duración de Capa'].sum().reset_index()
-    fig_duracion = px.bar(
-        duracion_por_fecha,
-        x='Fecha de Capa',
-        y='Duración de Capa',
-        title="Duración Total de Sesiones por Fecha (minutos)",
-        labels={'Duración de Capa': 'Duración (min)', 'Fecha de Capa': 'Fecha'},
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_duracion, use_container_width=True)
+    # Gráficos por fecha en un fragmento: cambiar la agrupación solo vuelve
+    # a ejecutar esta sección, no el resto del informe
+    @st.fragment
+    def graficos_por_fecha(asesor_seleccionado):
+        with medicion.fragmento('graficos por fecha', asesor=asesor_seleccionado):
+            # --- Gráfico: Sesiones por fecha ---
+            frecuencia = st.radio(
+                "Agrupar por:", list(FRECUENCIAS), format_func=FRECUENCIAS.get, horizontal=True
+            )
+            with medicion.etapa('agregado'):
+                por_fecha = conjunto.cubo.serie(asesor_seleccionado, frecuencia)
+            def construir_fig_sesiones():
+                return figura_sesiones(por_fecha)
+
+            with medicion.etapa('figuras'):
+                fig_sesiones = cache_figuras.obtener((SCRIPT, 'fig_sesiones', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_sesiones)
+            st.plotly_chart(fig_sesiones, use_container_width=True)
+
+            # --- Gráfico: Duración total por fecha ---
+            def construir_fig_duracion():
+                return figura_duracion(por_fecha)
+
+            with medicion.etapa('figuras'):
+                fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_duracion)
+            st.plotly_chart(fig_duracion, use_container_width=True)
+
+    graficos_por_fecha(asesor_seleccionado)
 
     # --- Tabla de Evaluadores y Fechas ---
     st.subheader("Evaluadores y detalles de las sesiones")
-    evaluadores_tabla = df_asesor[['Fecha de Capa', 'Evaluador', 'Duración de Capa']].copy()
-    evaluadores_tabla['Fecha de Capa'] = evaluadores_tabla['Fecha de Capa'].dt.strftime('%d-%m-%Y')
-    evaluadores_tabla.rename(columns={
-        'Fecha de Capa': 'Fecha de Capacitación',
-        'Evaluador': 'Evaluador',
-        'Duración de Capa': 'Duración (minutos)'
-    }, inplace=True)
-    st.dataframe(evaluadores_tabla.reset_index(drop=True), height=200)
+    st.dataframe(tabla_evaluadores(df_asesor), height=200)
 
     st.markdown("---")
 
     # --- Mostrar detalle por sesión ---
     st.subheader("Detalle por sesión y criterios evaluados")
-    for idx, row in df_asesor.iterrows():
-        fecha_str = row['Fecha de Capa'].strftime('%d-%m-%Y') if pd.notna(row['Fecha de Capa']) else "Fecha desconocida"
-        with st.expander(f"Sesión del {fecha_str} - Evaluador: {mostrar_valor(row.get('Evaluador'))} - Duración: {mostrar_valor(row.get('Duración de Capa'))} min"):
-            st.markdown(f"**Presentación:** {mostrar_valor(row.get('Presentación'))}")
-            st.markdown(f"**Nivel de Expertise en Presentación:** {mostrar_valor(row.get('Nivel de Expertise en Presentación'))}")
-
-            st.markdown(f"**Sondeo:** {mostrar_valor(row.get('Sondeo'))}")
-            st.markdown(f"**Nivel de Expertise en Sondeo:** {mostrar_valor(row.get('Nivel de Expertise en Sondeo'))}")
-
-            st.markdown(f"**Argumentación:** {mostrar_valor(row.get('Argumentación'))}")
-            st.markdown(f"**Nivel de Expertise en Argumentación:** {mostrar_valor(row.get('Nivel de Expertise en Argumentación'))}")
-
-            st.markdown(f"**Rebate:** {mostrar_valor(row.get('Rebate'))}")
-            st.markdown(f"**Nivel de Expertise en Rebate:** {mostrar_valor(row.get('Nivel de Expertise en Rebate'))}")
-
-            st.markdown(f"**Cierre:** {mostrar_valor(row.get('Cierre'))}")
-            st.markdown(f"**Nivel de Expertise en Cierre:** {mostrar_valor(row.get('Nivel de Expertise en Cierre'))}")
-
-            st.markdown(f"**¿Cumple los 6 Mandamientos de la Venta Carrión?:** {mostrar_valor(row.get('¿Cumple los 6 Mandamientos de la Venta Carrión?'))}")
-            st.markdown(f"**¿Cuál o cuáles mandamientos NO cumple?:** {mostrar_valor(row.get('¿Cuál o cuáles mandamientos NO cumple?'))}")
-
-            st.markdown(f"**Detalles o Comentarios Adicionales:** {mostrar_valor(row.get('Detalles o Comentarios Adicionales'))}")
-
-            st.markdown("---")
\ No newline at end of file
+    # Fragmento: cambiar de página solo vuelve a ejecutar el detalle
+    @st.fragment
+    def detalle_sesiones(df_asesor, asesor_seleccionado):
+        with medicion.fragmento('detalle de sesiones', asesor=asesor_seleccionado), medicion.etapa('detalle de sesiones'):
+            mostrar_detalle_sesiones(df_asesor, CAMPOS_DETALLE, f"detalle_{asesor_seleccionado}")
+
+    detalle_sesiones(df_asesor, asesor_seleccionado)
+
+st.markdown("---")
+
+# --- Búsqueda por palabras en todos los asesores ---
+st.subheader("🔎 Buscar sesiones por palabras")
+# Fragmento: escribir una búsqueda solo vuelve a ejecutar esta sección. La
+# búsqueda usa el índice invertido del conjunto, armado al cargar los datos
+@st.fragment
+def busqueda_sesiones():
+    with medicion.fragmento('busqueda'):
+        consulta = st.text_input(
+            "Palabras a buscar en los criterios y comentarios (sin importar tildes ni mayúsculas):",
+            placeholder="objeción, cierre apresurado…"
+        )
+        if not consulta.strip():
+            return
+        with medicion.etapa('busqueda'):
+            total, resultados = conjunto.buscar(consulta, LIMITE_BUSQUEDA)
+        if not total:
+            st.info("Ninguna sesión contiene todas esas palabras.")
+            return
+        if total > LIMITE_BUSQUEDA:
+            st.caption(f"{total} sesiones coinciden; se muestran las primeras {LIMITE_BUSQUEDA}.")
+        else:
+            st.caption(f"{total} sesiones coinciden.")
+        campos = [('Asesor Evaluado', 'Asesor Evaluado'), ('Coincidencias en', 'Coincidencias')] + CAMPOS_DETALLE
+        mostrar_detalle_sesiones(resultados, campos, f"busqueda_{consulta}")
+
+busqueda_sesiones()
+
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar(asesor=asesor_seleccionado)
@@ -1,40 +1,63 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+import glob
 import os
 
+from agregados import FRECUENCIAS
+from datos import LIBROS, obtener_conjunto
+from graficos import cache_figuras
+from informe_asesor import CAMPOS_DETALLE, figura_duracion, figura_sesiones, tabla_evaluadores
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+from vistas import mostrar_detalle_sesiones
+
 st.set_page_config(page_title="Dashboard Capacitación", layout="wide")
 
 st.title("📋 Informe de Capacitación por Asesor Evaluado")
 
-def mostrar_valor(valor):
-    if pd.isna(valor):
-        return "No disponible"
-    if isinstance(valor, str) and valor.strip() == '':
-        return "No disponible"
-    return valor
-
-# Ruta relativa al archivo (debe estar en la misma carpeta que este script)
-archivo_excel = "Entrenamiento_R3.xlsx"
+# Ruta relativa al archivo (debe estar en la misma carpeta que este script);
+# con DASHBOARD_LIBROS puede ser un patrón o una carpeta con varias rondas
+archivo_excel = LIBROS
 
-if not os.path.exists(archivo_excel):
+if not glob.glob(archivo_excel):
     st.error(f"Archivo '{archivo_excel}' no encontrado en la carpeta actual.")
     st.stop()
 
-df = pd.read_excel(archivo_excel)
-df['Fecha de Capa'] = pd.to_datetime(df['Fecha de Capa'], errors='coerce')
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
+
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
 
-asesores = df['Asesor Evaluado'].dropna().unique()
-asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", sorted(asesores))
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'Evaluador', 'Fecha de Capa', 'Duración de Capa',
+    'Presentación', 'Nivel de Expertise en Presentación',
+    'Sondeo', 'Nivel de Expertise en Sondeo',
+    'Argumentación', 'Nivel de Expertise en Argumentación',
+    'Rebate', 'Nivel de Expertise en Rebate',
+    'Cierre', 'Nivel de Expertise en Cierre',
+    '¿Cumple los 6 Mandamientos de la Venta Carrión?',
+    '¿Cuál o cuáles mandamientos NO cumple?',
+    'Detalles o Comentarios Adicionales'
+]
 
-df_asesor = df[df['Asesor Evaluado'] == asesor_seleccionado].sort_values('Fecha de Capa')
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(archivo_excel, COLUMNAS)
+
+asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", conjunto.indice.asesores())
+
+with medicion.etapa('filtro'):
+    df_asesor = conjunto.indice.sesiones(asesor_seleccionado)
 
 if df_asesor.empty:
     st.warning("⚠️ No hay datos para el asesor seleccionado.")
 else:
-    total_sesiones = len(df_asesor)
-    duracion_total = df_asesor['Duración de Capa'].sum()
-    duracion_media = df_asesor['Duración de Capa'].mean()
+    with medicion.etapa('agregado'):
+        resumen = conjunto.cubo.resumen(asesor_seleccionado)
+    total_sesiones = resumen['sesiones']
+    duracion_total = resumen['duracion_total']
+    duracion_media = resumen['duracion_media']
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Sesiones Totales", total_sesiones)
@@ -43,62 +66,45 @@ else:
 
     st.markdown("---")
 
-    sesiones_por_fecha = df_asesor.groupby('Fecha de Capa').size().reset_index(name='Cantidad de Sesiones')
-    fig_sesiones = px.bar(
-        sesiones_por_fecha,
-        x='Fecha de Capa',
-        y='Cantidad de Sesiones',
-        title="Número de Sesiones por Fecha",
-        labels={'Cantidad de Sesiones': 'Cantidad', 'Fecha de Capa': 'Fecha'},
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_sesiones, use_container_width=True)
-
-    duracion_por_fecha = df_asesor.groupby('Fecha de Capa')['Duración de Capa'].sum().reset_index()
-    fig_duracion = px.bar(
-        duracion_por_fecha,
-        x='Fecha de Capa',
-        y='Duración de Capa',
-        title="Duración Total de Sesiones por Fecha (minutos)",
-        labels={'Duración de Capa': 'Duración (min)', 'Fecha de Capa': 'Fecha'},
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_duracion, use_container_width=True)
-
-    st.subheader("Evaluadores y detalles de las sesiones")
-    evaluadores_tabla = df_asesor[['Fecha de Capa', 'Evaluador', 'Duración de Capa']].copy()
-    evaluadores_tabla['Fecha de Capa'] = evaluadores_tabla['Fecha de Capa'].dt.strftime('%d-%m-%Y')
-    evaluadores_tabla.rename(columns={
-        'Fecha de Capa': 'Fecha de Capacitación',
-        'Evaluador': 'Evaluador',
-        'Duración de Capa': 'Duración (minutos)'
-    }, inplace=True)
-    st.dataframe(evaluadores_tabla.reset_index(drop=True), height=200)
+    # Gráficos por fecha en un fragmento: cambiar la agrupación solo vuelve
+    # a ejecutar esta sección, no el resto del informe
+    @st.fragment
+    def graficos_por_fecha(asesor_seleccionado):
+        with medicion.fragmento('graficos por fecha', asesor=asesor_seleccionado):
+            frecuencia = st.radio(
+                "Agrupar por:", list(FRECUENCIAS), format_func=FRECUENCIAS.get, horizontal=True
+            )
+            with medicion.etapa('agregado'):
+                por_fecha = conjunto.cubo.serie(asesor_seleccionado, frecuencia)
+            def construir_fig_sesiones():
+                return figura_sesiones(por_fecha)
 
-    st.markdown("---")
+            with medicion.etapa('figuras'):
+                fig_sesiones = cache_figuras.obtener((SCRIPT, 'fig_sesiones', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_sesiones)
+            st.plotly_chart(fig_sesiones, use_container_width=True)
 
-    st.subheader("Detalle por sesión y criterios evaluados")
-    for idx, row in df_asesor.iterrows():
-        fecha_str = row['Fecha de Capa'].strftime('%d-%m-%Y') if pd.notna(row['Fecha de Capa']) else "Fecha desconocida"
-        with st.expander(f"Sesión del {fecha_str} - Evaluador: {mostrar_valor(row.get('Evaluador'))} - Duración: {mostrar_valor(row.get('Duración de Capa'))} min"):
-            st.markdown(f"**Presentación:** {mostrar_valor(row.get('Presentación'))}")
-            st.markdown(f"**Nivel de Expertise en Presentación:** {mostrar_valor(row.get('Nivel de Expertise en Presentación'))}")
+            def construir_fig_duracion():
+                return figura_duracion(por_fecha)
 
-            st.markdown(f"**Sondeo:** {mostrar_valor(row.get('Sondeo'))}")
-            st.markdown(f"**Nivel de Expertise en Sondeo:** {mostrar_valor(row.get('Nivel de Expertise en Sondeo'))}")
+            with medicion.etapa('figuras'):
+                fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_duracion)
+            st.plotly_chart(fig_duracion, use_container_width=True)
 
-            st.markdown(f"**Argumentación:** {mostrar_valor(row.get('Argumentación'))}")
-            st.markdown(f"**Nivel de Expertise en Argumentación:** {mostrar_valor(row.get('Nivel de Expertise en Argumentación'))}")
+    graficos_por_fecha(asesor_seleccionado)
 
-            st.markdown(f"**Rebate:** {mostrar_valor(row.get('Rebate'))}")
-            st.markdown(f"**Nivel de Expertise en Rebate:** {mostrar_valor(row.get('Nivel de Expertise en Rebate'))}")
+    st.subheader("Evaluadores y detalles de las sesiones")
+    st.dataframe(tabla_evaluadores(df_asesor), height=200)
 
-            st.markdown(f"**Cierre:** {mostrar_valor(row.get('Cierre'))}")
-            st.markdown(f"**Nivel de Expertise en Cierre:** {mostrar_valor(row.get('Nivel de Expertise en Cierre'))}")
+    st.markdown("---")
 
-            st.markdown(f"**¿Cumple los 6 Mandamientos de la Venta Carrión?:** {mostrar_valor(row.get('¿Cumple los 6 Mandamientos de la Venta Carrión?'))}")
-            st.markdown(f"**¿Cuál o cuáles mandamientos NO cumple?:** {mostrar_valor(row.get('¿Cuál o cuáles mandamientos NO cumple?'))}")
+    st.subheader("Detalle por sesión y criterios evaluados")
+    # Fragmento: cambiar de página solo vuelve a ejecutar el detalle
+    @st.fragment
+    def detalle_sesiones(df_asesor, asesor_seleccionado):
+        with medicion.fragmento('detalle de sesiones', asesor=asesor_seleccionado), medicion.etapa('detalle de sesiones'):
+            mostrar_detalle_sesiones(df_asesor, CAMPOS_DETALLE, f"detalle_{asesor_seleccionado}")
 
-            st.markdown(f"**Detalles o Comentarios Adicionales:** {mostrar_valor(row.get('Detalles o Comentarios Adicionales'))}")
+    detalle_sesiones(df_asesor, asesor_seleccionado)
 
-            st.markdown("---")
\ No newline at end of file
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar(asesor=asesor_seleccionado)
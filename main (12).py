@@ -0,0 +1,118 @@
+import streamlit as st
+import plotly.express as px
+import os
+
+from datos import COLUMNAS_EXPERTISE, LIBROS, obtener_conjunto
+from graficos import cache_figuras
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+
+# Configuración de página
+st.set_page_config(page_title="Ranking de Asesores", layout="wide")
+
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
+
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
+
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'Fecha de Capa', 'Duración de Capa',
+    'Nivel de Expertise en Presentación', 'Nivel de Expertise en Sondeo',
+    'Nivel de Expertise en Argumentación', 'Nivel de Expertise en Rebate',
+    'Nivel de Expertise en Cierre',
+    '¿Cuál o cuáles mandamientos NO cumple?'
+]
+
+# Nombres visibles de las columnas del ranking
+NOMBRES = {
+    'sesiones': 'Sesiones',
+    'duracion_total': 'Duración Total (min)',
+    'duracion_media': 'Duración Media (min)',
+    'puntaje_medio': 'Puntaje Promedio',
+    **{columna: columna.replace('Nivel de Expertise en ', '') for columna in COLUMNAS_EXPERTISE},
+    'cumplimiento': 'Cumplimiento de Mandamientos (%)',
+    'tendencia': 'Tendencia del Puntaje (por sesión)',
+}
+
+# La tendencia de cada asesor es la pendiente del puntaje en sus últimas N sesiones
+VENTANA_TENDENCIA = 5
+
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(LIBROS, COLUMNAS)
+
+st.title("🏆 Ranking de Asesores Evaluados")
+
+# Tabla de todos los asesores, calculada una vez por versión de los datos
+with medicion.etapa('agregado'):
+    ranking = conjunto.ranking()
+    tendencias = conjunto.tendencias(VENTANA_TENDENCIA).indicadores('Puntaje Promedio')
+    tendencias = tendencias.reindex(ranking['Asesor Evaluado'].astype(str))
+    ranking = ranking.assign(tendencia=tendencias['pendiente'].to_numpy(), estado=tendencias['estado'].to_numpy())
+
+# Filtros y orden: solo seleccionan y ordenan filas de la tabla ya calculada
+with st.sidebar:
+    st.header("Filtros")
+    busqueda = st.text_input("Buscar asesor:")
+    maximo_sesiones = int(ranking['sesiones'].max()) if len(ranking) else 1
+    minimo_sesiones = st.slider("Mínimo de sesiones:", 1, maximo_sesiones, 1) if maximo_sesiones > 1 else 1
+    metrica = st.selectbox("Ordenar por:", list(NOMBRES), index=list(NOMBRES).index('puntaje_medio'), format_func=NOMBRES.get)
+    ascendente = st.checkbox("Orden ascendente", value=False)
+
+with medicion.etapa('filtro'):
+    tabla = ranking[ranking['sesiones'] >= minimo_sesiones]
+    if busqueda.strip():
+        tabla = tabla[tabla['Asesor Evaluado'].astype(str).str.contains(busqueda.strip(), case=False, regex=False)]
+    tabla = tabla.sort_values(metrica, ascending=ascendente, na_position='last', kind='mergesort')
+    tabla.insert(0, 'Puesto', range(1, len(tabla) + 1))
+
+if tabla.empty:
+    st.warning("⚠️ Ningún asesor cumple los filtros seleccionados.")
+else:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Asesores", len(tabla))
+    col2.metric("Sesiones", int(tabla['sesiones'].sum()))
+    col3.metric("Puntaje Promedio (media de asesores)", f"{tabla['puntaje_medio'].mean():.2f}")
+
+    # Gráfico: los 15 primeros según la métrica elegida
+    primeros = tabla.head(15)
+    def construir_fig_ranking():
+        fig_ranking = px.bar(
+            primeros,
+            x=metrica,
+            y=primeros['Asesor Evaluado'].astype(str),
+            orientation='h',
+            title=f"Top {len(primeros)} por {NOMBRES[metrica]}",
+            labels={metrica: NOMBRES[metrica], 'y': 'Asesor'},
+            template='plotly_white'
+        )
+        fig_ranking.update_layout(yaxis=dict(autorange='reversed'), height=150 + 30 * len(primeros))
+        return fig_ranking
+
+    with medicion.etapa('figuras'):
+        fig_ranking = cache_figuras.obtener(
+            (SCRIPT, 'fig_ranking', busqueda.strip().casefold(), minimo_sesiones, metrica, ascendente, conjunto.version),
+            construir_fig_ranking
+        )
+    st.plotly_chart(fig_ranking, use_container_width=True)
+
+    # Las columnas también se pueden ordenar desde el encabezado de la tabla
+    st.subheader("📋 Todos los asesores")
+    st.dataframe(
+        tabla.rename(columns={**NOMBRES, 'estado': 'Tendencia'}).assign(**{'Asesor Evaluado': tabla['Asesor Evaluado'].astype(str)}),
+        hide_index=True,
+        height=600,
+        column_config={
+            'Duración Total (min)': st.column_config.NumberColumn(format="%.1f"),
+            'Duración Media (min)': st.column_config.NumberColumn(format="%.1f"),
+            'Puntaje Promedio': st.column_config.NumberColumn(format="%.2f"),
+            **{NOMBRES[columna]: st.column_config.NumberColumn(format="%.2f") for columna in COLUMNAS_EXPERTISE},
+            'Cumplimiento de Mandamientos (%)': st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+            'Tendencia del Puntaje (por sesión)': st.column_config.NumberColumn(format="%+.3f"),
+        }
+    )
+
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar()
@@ -1,6 +1,13 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import os
+
+from agregados import UNIDADES_VENTANA
+from datos import LIBROS, obtener_conjunto
+from graficos import agregar_tendencia, cache_figuras, linea_puntajes
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+from vistas import formatear_fecha, metrica_tendencia, mostrar_lineas, paginar, texto_o_vacio
 
 st.set_page_config(
     page_title="Dashboard Capacitación",
@@ -8,21 +15,20 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
-def cargar_datos():
-    df = pd.read_excel('Entrenamiento_R3.xlsx')
-    df['Fecha de Capa'] = pd.to_datetime(df['Fecha de Capa'], errors='coerce')
-    expertise_cols = [
-        'Nivel de Expertise en Presentación',
-        'Nivel de Expertise en Sondeo',
-        'Nivel de Expertise en Argumentación',
-        'Nivel de Expertise en Rebate',
-        'Nivel de Expertise en Cierre'
-    ]
-    df['Puntaje Promedio'] = df[expertise_cols].mean(axis=1)
-    return df
-
-df = cargar_datos()
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
+
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
+
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'ID', 'Evaluador', 'Fecha de Capa', 'Duración de Capa', 'Detalles o Comentarios Adicionales'
+]
+
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(LIBROS, COLUMNAS)
 
 # Estilo CSS para fondo blanco y texto negro/gris
 st.markdown("""
@@ -50,11 +56,9 @@ st.title("📊 Dashboard de Capacitación por Asesor Evaluado")
 
 with st.sidebar:
     st.header("Filtros")
-    asesores = df['Asesor Evaluado'].dropna().unique()
-    asesor_seleccionado = st.selectbox("Selecciona el Asesor Evaluado:", sorted(asesores))
+    asesor_seleccionado = st.selectbox("Selecciona el Asesor Evaluado:", conjunto.indice.asesores())
 
-    fecha_min = df['Fecha de Capa'].min()
-    fecha_max = df['Fecha de Capa'].max()
+    fecha_min, fecha_max = conjunto.rango_fechas()
     fecha_inicio, fecha_fin = st.date_input(
         "Rango de fechas (Fecha de Capacitación):",
         value=[fecha_min, fecha_max],
@@ -62,67 +66,98 @@ with st.sidebar:
         max_value=fecha_max
     )
 
-df_filtrado = df[
-    (df['Asesor Evaluado'] == asesor_seleccionado) &
-    (df['Fecha de Capa'] >= pd.to_datetime(fecha_inicio)) &
-    (df['Fecha de Capa'] <= pd.to_datetime(fecha_fin))
-].sort_values('Fecha de Capa')
+    # Ventana de la media móvil del puntaje: últimas N sesiones o N días
+    unidad_tendencia = st.radio("Tendencia por:", list(UNIDADES_VENTANA), format_func=UNIDADES_VENTANA.get, horizontal=True)
+    if unidad_tendencia == 'sesiones':
+        ventana_tendencia = st.slider("Ventana de la tendencia (sesiones):", 2, 30, 5)
+    else:
+        ventana_tendencia = st.slider("Ventana de la tendencia (días):", 7, 90, 30)
+
+with medicion.etapa('filtro'):
+    df_filtrado = conjunto.indice.sesiones(asesor_seleccionado, fecha_inicio, fecha_fin)
 
 if df_filtrado.empty:
     st.warning("⚠️ No hay datos disponibles para los filtros seleccionados.")
+    medicion.cerrar(asesor=asesor_seleccionado)
     st.stop()
 
 # Estadísticas clave
-total_sesiones = len(df_filtrado)
-duracion_total = df_filtrado['Duración de Capa'].sum()
-duracion_media = df_filtrado['Duración de Capa'].mean()
-puntaje_medio = df_filtrado['Puntaje Promedio'].mean()
-
-col1, col2, col3, col4 = st.columns(4)
+with medicion.etapa('agregado'):
+    resumen = conjunto.cubo.resumen(asesor_seleccionado, fecha_inicio, fecha_fin)
+    # Tendencias de todos los asesores, calculadas una vez por versión y ventana;
+    # la media móvil usa también las sesiones anteriores al rango elegido
+    tendencias = conjunto.tendencias(ventana_tendencia, unidad_tendencia)
+    filas = conjunto.indice.rango(asesor_seleccionado, fecha_inicio, fecha_fin)
+    tendencia = tendencias.serie(*filas)
+    ultima = tendencias.ultima('Puntaje Promedio', *filas)
+total_sesiones = resumen['sesiones']
+duracion_total = resumen['duracion_total']
+duracion_media = resumen['duracion_media']
+puntaje_medio = resumen['puntaje_medio']
+
+col1, col2, col3, col4, col5 = st.columns(5)
 col1.metric("Sesiones Totales", total_sesiones)
 col2.metric("Duración Total (min)", f"{duracion_total:.1f}")
 col3.metric("Duración Media (min)", f"{duracion_media:.1f}")
 col4.metric("Puntaje Promedio", f"{puntaje_medio:.2f}")
+metrica_tendencia(col5, "Tendencia del Puntaje", ultima, unidad_tendencia)
 
 st.markdown("---")
 
 # Gráfico: Duración de sesiones (barra)
-fig_duracion = px.bar(
-    df_filtrado,
-    x='Fecha de Capa',
-    y='Duración de Capa',
-    labels={'Duración de Capa': 'Duración (minutos)', 'Fecha de Capa': 'Fecha'},
-    title="⏱️ Duración de Capacitación por Fecha",
-    text=df_filtrado['Duración de Capa'].round(1),
-    color_discrete_sequence=['#0077b6']  # azul profesional y legible sobre blanco
-)
-fig_duracion.update_traces(textposition='outside')
-fig_duracion.update_layout(
-    yaxis=dict(range=[0, max(df_filtrado['Duración de Capa']) * 1.3]),
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    font=dict(color='#111111'),
-    margin=dict(t=50, b=50, l=25, r=25)
-)
+def construir_fig_duracion():
+    fig_duracion = px.bar(
+        df_filtrado,
+        x='Fecha de Capa',
+        y='Duración de Capa',
+        labels={'Duración de Capa': 'Duración (minutos)', 'Fecha de Capa': 'Fecha'},
+        title="⏱️ Duración de Capacitación por Fecha",
+        text=df_filtrado['Duración de Capa'].round(1),
+        color_discrete_sequence=['#0077b6']  # azul profesional y legible sobre blanco
+    )
+    fig_duracion.update_traces(textposition='outside')
+    fig_duracion.update_layout(
+        yaxis=dict(range=[0, max(df_filtrado['Duración de Capa']) * 1.3]),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(color='#111111'),
+        margin=dict(t=50, b=50, l=25, r=25)
+    )
+    return fig_duracion
+
+with medicion.etapa('figuras'):
+    fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion', asesor_seleccionado, (fecha_inicio, fecha_fin), conjunto.version), construir_fig_duracion)
 st.plotly_chart(fig_duracion, use_container_width=True)
 
 # Gráfico: Puntaje promedio por sesión (línea)
-fig_puntaje = px.line(
-    df_filtrado,
-    x='Fecha de Capa',
-    y='Puntaje Promedio',
-    markers=True,
-    labels={'Puntaje Promedio': 'Puntaje Promedio', 'Fecha de Capa': 'Fecha'},
-    title="⭐ Puntaje Promedio por Sesión",
-    color_discrete_sequence=['#00b4d8']  # azul claro
-)
-fig_puntaje.update_layout(
-    yaxis=dict(range=[0, 5]),
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    font=dict(color='#111111'),
-    margin=dict(t=50, b=50, l=25, r=25)
-)
+def construir_fig_puntaje():
+    fig_puntaje = linea_puntajes(
+        df_filtrado,
+        x='Fecha de Capa',
+        y='Puntaje Promedio',
+        markers=True,
+        labels={'Puntaje Promedio': 'Puntaje Promedio', 'Fecha de Capa': 'Fecha'},
+        title="⭐ Puntaje Promedio por Sesión",
+        color_discrete_sequence=['#00b4d8']  # azul claro
+    )
+    fig_puntaje.update_layout(
+        yaxis=dict(range=[0, 5]),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(color='#111111'),
+        margin=dict(t=50, b=50, l=25, r=25)
+    )
+    agregar_tendencia(
+        fig_puntaje,
+        tendencia['Fecha de Capa'],
+        tendencia['Puntaje Promedio'],
+        f"Media móvil ({ventana_tendencia} {UNIDADES_VENTANA[unidad_tendencia].lower()})",
+        '#023e8a'
+    )
+    return fig_puntaje
+
+with medicion.etapa('figuras'):
+    fig_puntaje = cache_figuras.obtener((SCRIPT, 'fig_puntaje', asesor_seleccionado, (fecha_inicio, fecha_fin), conjunto.version, ventana_tendencia, unidad_tendencia), construir_fig_puntaje)
 st.plotly_chart(fig_puntaje, use_container_width=True)
 
 # Tabla con datos esenciales
@@ -135,11 +170,17 @@ st.dataframe(df_filtrado[columnas_mostrar].reset_index(drop=True), height=350)
 
 # Comentarios detallados
 st.subheader("📝 Comentarios por Sesión")
-for _, row in df_filtrado.iterrows():
-    comentario = row['Detalles o Comentarios Adicionales']
-    if pd.isna(comentario) or comentario.strip() == "":
-        comentario = "_No hay comentarios disponibles._"
-    st.markdown(f"**Sesión ID {row['ID']} ({row['Fecha de Capa'].date()}):** {comentario}")
+# Fragmento: cambiar de página solo vuelve a ejecutar los comentarios
+@st.fragment
+def comentarios_por_sesion(df_filtrado, asesor_seleccionado):
+    with medicion.fragmento('comentarios', asesor=asesor_seleccionado), medicion.etapa('comentarios'):
+        inicio, fin = paginar(len(df_filtrado), f"comentarios_{asesor_seleccionado}")
+        pagina = df_filtrado.iloc[inicio:fin]
+        comentarios = texto_o_vacio(pagina['Detalles o Comentarios Adicionales'], "_No hay comentarios disponibles._")
+        fechas = formatear_fecha(pagina['Fecha de Capa'], '%Y-%m-%d')
+        mostrar_lineas("**Sesión ID " + pagina['ID'].astype(str) + " (" + fechas + "):** " + comentarios)
+
+comentarios_por_sesion(df_filtrado, asesor_seleccionado)
 
 st.markdown("---")
 st.markdown(
@@ -148,4 +189,7 @@ st.markdown(
     "Selecciona diferentes filtros para explorar los datos."
     "</p>",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar(asesor=asesor_seleccionado)
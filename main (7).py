@@ -1,50 +1,132 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from collections import Counter
+import os
+
+from agregados import UNIDADES_VENTANA, resumen_por_asesor
+from datos import COLUMNAS_EXPERTISE, LIBROS, obtener_conjunto
+from exportacion import nombre_archivo
+from graficos import cache_figuras, linea_puntajes
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+from vistas import descarga_tabla, formatear_fecha, metrica_tendencia, mostrar_lineas, paginar, tabla_paginada, texto_o_vacio
 
 # Configuración de página
 st.set_page_config(page_title="Dashboard Capacitación", layout="wide")
 
-@st.cache_data
-def cargar_datos():
-    # Leer archivo Excel
-    df = pd.read_excel('Entrenamiento_R3.xlsx')
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
 
-    # Convertir fechas
-    df['Fecha de Capa'] = pd.to_datetime(df['Fecha de Capa'], errors='coerce')
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
 
-    # Crear columna de Puntaje Promedio basado en criterios individuales
-    expertise_cols = [
-        'Nivel de Expertise en Presentación',
-        'Nivel de Expertise en Sondeo',
-        'Nivel de Expertise en Argumentación',
-        'Nivel de Expertise en Rebate',
-        'Nivel de Expertise en Cierre'
-    ]
-    df['Puntaje Promedio'] = df[expertise_cols].mean(axis=1)
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'Evaluador', 'Fecha de Capa', 'Duración de Capa',
+    'Nivel de Expertise en Presentación', 'Nivel de Expertise en Sondeo',
+    'Nivel de Expertise en Argumentación', 'Nivel de Expertise en Rebate',
+    'Nivel de Expertise en Cierre',
+    '¿Cumple los 6 Mandamientos de la Venta Carrión?',
+    '¿Cuál o cuáles mandamientos NO cumple?',
+    'Detalles o Comentarios Adicionales'
+]
 
-    return df
-
-df = cargar_datos()
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(LIBROS, COLUMNAS)
 
 st.title("📊 Dashboard de Capacitación por Asesor Evaluado")
 
+# Modo comparación: varios asesores a la vez en gráficos compartidos
+if st.toggle("Comparar varios asesores"):
+    seleccion = st.multiselect(
+        "🔎 Selecciona los Asesores Evaluados:", conjunto.indice.asesores(),
+        default=conjunto.indice.asesores()[:2]
+    )
+    if not seleccion:
+        st.info("Selecciona al menos un asesor para comparar.")
+        medicion.cerrar(asesores=seleccion)
+        st.stop()
+
+    # Una sola selección con las sesiones de todos los elegidos (sus rangos del
+    # índice) y un solo groupby para las métricas: el costo depende de cuántas
+    # sesiones tienen los elegidos, no de cuántos son
+    with medicion.etapa('filtro'):
+        df_comparacion = conjunto.indice.sesiones_varios(seleccion)
+    with medicion.etapa('agregado'):
+        metricas = resumen_por_asesor(df_comparacion, COLUMNAS_EXPERTISE).set_index('Asesor Evaluado').reindex(seleccion)
+    orden_asesores = {'Asesor Evaluado': seleccion}
+
+    st.subheader("📋 Métricas por Asesor")
+    tabla_metricas = metricas.drop(columns='cumplimiento').rename(columns={
+        'sesiones': 'Sesiones Totales',
+        'duracion_total': 'Duración Total (min)',
+        'duracion_media': 'Duración Media (min)',
+        'puntaje_medio': 'Puntaje Promedio',
+        **{c: c.replace('Nivel de Expertise en ', '') for c in COLUMNAS_EXPERTISE},
+    })
+    st.dataframe(tabla_metricas.style.format(precision=2))
+
+    # Duración de las sesiones de todos los elegidos en un mismo gráfico
+    def construir_fig_duracion_comparada():
+        fig_duracion = px.bar(
+            df_comparacion,
+            x='Fecha de Capa',
+            y='Duración de Capa',
+            color='Asesor Evaluado',
+            barmode='group',
+            category_orders=orden_asesores,
+            title="Duración de Capacitación por Fecha",
+            labels={'Duración de Capa': 'Duración (minutos)', 'Fecha de Capa': 'Fecha'}
+        )
+        return fig_duracion
+
+    with medicion.etapa('figuras'):
+        fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion_comparada', tuple(seleccion), None, conjunto.version), construir_fig_duracion_comparada)
+    st.plotly_chart(fig_duracion, use_container_width=True)
+
+    # Puntajes del criterio elegido, una línea por asesor
+    criterio = st.radio(
+        "Criterio:", COLUMNAS_EXPERTISE + ['Puntaje Promedio'],
+        format_func=lambda c: c.replace('Nivel de Expertise en ', ''), horizontal=True
+    )
+    def construir_fig_criterio_comparado():
+        fig_criterio = linea_puntajes(
+            df_comparacion,
+            x='Fecha de Capa',
+            y=criterio,
+            color='Asesor Evaluado',
+            markers=True,
+            category_orders=orden_asesores,
+            title=f"Evolución de {criterio.replace('Nivel de Expertise en ', '')} por Asesor",
+            labels={criterio: 'Puntaje', 'Fecha de Capa': 'Fecha'}
+        )
+        fig_criterio.update_layout(yaxis_range=[0, 5])
+        return fig_criterio
+
+    with medicion.etapa('figuras'):
+        fig_criterio = cache_figuras.obtener((SCRIPT, 'fig_criterio_comparado', tuple(seleccion), None, conjunto.version, criterio), construir_fig_criterio_comparado)
+    st.plotly_chart(fig_criterio, use_container_width=True)
+
+    medicion.cerrar(asesores=seleccion)
+    st.stop()
+
 # Selección de asesor evaluado
-asesores = df['Asesor Evaluado'].dropna().unique()
-asesor_seleccionado = st.selectbox("🔎 Selecciona el Asesor Evaluado:", sorted(asesores))
+asesor_seleccionado = st.selectbox("🔎 Selecciona el Asesor Evaluado:", conjunto.indice.asesores())
 
 # Filtrar datos por asesor seleccionado y ordenar por fecha
-df_asesor = df[df['Asesor Evaluado'] == asesor_seleccionado].sort_values('Fecha de Capa')
+with medicion.etapa('filtro'):
+    df_asesor = conjunto.indice.sesiones(asesor_seleccionado)
 
 if df_asesor.empty:
     st.warning("⚠️ No se encontraron datos para el asesor seleccionado.")
 else:
     # Estadísticas generales
-    total_sesiones = len(df_asesor)
-    duracion_total = df_asesor['Duración de Capa'].sum()
-    duracion_media = df_asesor['Duración de Capa'].mean()
-    puntaje_medio = df_asesor['Puntaje Promedio'].mean()
+    with medicion.etapa('agregado'):
+        resumen = conjunto.cubo.resumen(asesor_seleccionado)
+    total_sesiones = resumen['sesiones']
+    duracion_total = resumen['duracion_total']
+    duracion_media = resumen['duracion_media']
+    puntaje_medio = resumen['puntaje_medio']
 
     # Mostrar métricas en columnas
     col1, col2, col3, col4 = st.columns(4)
@@ -56,16 +138,21 @@ else:
     st.markdown("---")
 
     # Gráfico 1: Duración de sesiones a lo largo del tiempo
-    fig_duracion = px.bar(
-        df_asesor,
-        x='Fecha de Capa',
-        y='Duración de Capa',
-        title="Duración de Capacitación por Fecha",
-        labels={'Duración de Capa': 'Duración (minutos)', 'Fecha de Capa': 'Fecha'},
-        text='Duración de Capa'
-    )
-    fig_duracion.update_traces(textposition='outside')
-    fig_duracion.update_layout(yaxis_range=[0, max(df_asesor['Duración de Capa']) * 1.2])
+    def construir_fig_duracion():
+        fig_duracion = px.bar(
+            df_asesor,
+            x='Fecha de Capa',
+            y='Duración de Capa',
+            title="Duración de Capacitación por Fecha",
+            labels={'Duración de Capa': 'Duración (minutos)', 'Fecha de Capa': 'Fecha'},
+            text='Duración de Capa'
+        )
+        fig_duracion.update_traces(textposition='outside')
+        fig_duracion.update_layout(yaxis_range=[0, max(df_asesor['Duración de Capa']) * 1.2])
+        return fig_duracion
+
+    with medicion.etapa('figuras'):
+        fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion', asesor_seleccionado, None, conjunto.version), construir_fig_duracion)
     st.plotly_chart(fig_duracion, use_container_width=True)
 
     # Gráfico 2: Puntajes por criterio (solo los niveles numéricos)
@@ -77,26 +164,77 @@ else:
         'Nivel de Expertise en Cierre'
     ]
 
-    df_melt = df_asesor.melt(
-        id_vars=['Fecha de Capa'],
-        value_vars=criterios,
-        var_name='Criterio',
-        value_name='Puntaje'
-    )
-    df_melt['Criterio'] = df_melt['Criterio'].str.replace('Nivel de Expertise en ', '')
-
-    fig_criterios = px.line(
-        df_melt,
-        x='Fecha de Capa',
-        y='Puntaje',
-        color='Criterio',
-        markers=True,
-        title="Evolución de Puntajes por Criterio",
-        labels={'Puntaje': 'Puntaje', 'Fecha de Capa': 'Fecha'}
-    )
-    fig_criterios.update_layout(yaxis_range=[0, 5])
+    def construir_fig_criterios():
+        df_melt = df_asesor.melt(
+            id_vars=['Fecha de Capa'],
+            value_vars=criterios,
+            var_name='Criterio',
+            value_name='Puntaje'
+        )
+        df_melt['Criterio'] = df_melt['Criterio'].str.replace('Nivel de Expertise en ', '')
+
+        fig_criterios = linea_puntajes(
+            df_melt,
+            x='Fecha de Capa',
+            y='Puntaje',
+            color='Criterio',
+            markers=True,
+            title="Evolución de Puntajes por Criterio",
+            labels={'Puntaje': 'Puntaje', 'Fecha de Capa': 'Fecha'}
+        )
+        fig_criterios.update_layout(yaxis_range=[0, 5])
+        return fig_criterios
+
+    with medicion.etapa('figuras'):
+        fig_criterios = cache_figuras.obtener((SCRIPT, 'fig_criterios', asesor_seleccionado, None, conjunto.version), construir_fig_criterios)
     st.plotly_chart(fig_criterios, use_container_width=True)
 
+    # Tendencia por criterio: media móvil de cada criterio y si mejora o empeora.
+    # Fragmento: cambiar la ventana solo vuelve a ejecutar esta sección
+    @st.fragment
+    def tendencias_por_criterio(asesor_seleccionado):
+        with medicion.fragmento('tendencias', asesor=asesor_seleccionado):
+            st.subheader("📈 Tendencia por Criterio")
+            col_unidad, col_ventana = st.columns(2)
+            unidad = col_unidad.radio("Tendencia por:", list(UNIDADES_VENTANA), format_func=UNIDADES_VENTANA.get, horizontal=True)
+            if unidad == 'sesiones':
+                ventana = col_ventana.slider("Ventana de la tendencia (sesiones):", 2, 30, 5)
+            else:
+                ventana = col_ventana.slider("Ventana de la tendencia (días):", 7, 90, 30)
+
+            # Tendencias de todos los asesores, calculadas una vez por versión y ventana
+            with medicion.etapa('agregado'):
+                tendencias = conjunto.tendencias(ventana, unidad)
+                filas = conjunto.indice.rango(asesor_seleccionado)
+            for col, criterio in zip(st.columns(len(criterios)), criterios):
+                metrica_tendencia(col, criterio.replace('Nivel de Expertise en ', ''), tendencias.ultima(criterio, *filas), unidad)
+
+            def construir_fig_tendencias():
+                df_melt = tendencias.serie(*filas).melt(
+                    id_vars=['Fecha de Capa'],
+                    value_vars=criterios,
+                    var_name='Criterio',
+                    value_name='Media móvil'
+                )
+                df_melt['Criterio'] = df_melt['Criterio'].str.replace('Nivel de Expertise en ', '')
+
+                fig_tendencias = linea_puntajes(
+                    df_melt,
+                    x='Fecha de Capa',
+                    y='Media móvil',
+                    color='Criterio',
+                    title=f"Media Móvil por Criterio (últimas {ventana} {UNIDADES_VENTANA[unidad].lower()})",
+                    labels={'Media móvil': 'Puntaje (media móvil)', 'Fecha de Capa': 'Fecha'}
+                )
+                fig_tendencias.update_layout(yaxis_range=[0, 5])
+                return fig_tendencias
+
+            with medicion.etapa('figuras'):
+                fig_tendencias = cache_figuras.obtener((SCRIPT, 'fig_tendencias', asesor_seleccionado, None, conjunto.version, ventana, unidad), construir_fig_tendencias)
+            st.plotly_chart(fig_tendencias, use_container_width=True)
+
+    tendencias_por_criterio(asesor_seleccionado)
+
     # Tabla con toda la información requerida
     columnas_mostrar = [
         'Fecha de Capa',
@@ -113,27 +251,59 @@ else:
     ]
 
     st.subheader("📋 Detalles de Sesiones")
-    st.dataframe(df_asesor[columnas_mostrar].reset_index(drop=True), height=400)
+    # Fragmento: cambiar de página o de formato solo vuelve a ejecutar la tabla.
+    # En pantalla va una página; la descarga lleva todas las sesiones
+    @st.fragment
+    def detalle_tabla(df_asesor, asesor_seleccionado):
+        with medicion.fragmento('tabla', asesor=asesor_seleccionado), medicion.etapa('tabla'):
+            tabla = df_asesor[columnas_mostrar].reset_index(drop=True)
+            descarga_tabla(tabla, f"sesiones_{nombre_archivo(asesor_seleccionado)}", f"tabla_{asesor_seleccionado}")
+            tabla_paginada(tabla, f"tabla_{asesor_seleccionado}", height=400)
+
+    detalle_tabla(df_asesor, asesor_seleccionado)
 
     # Comentarios por sesión
     st.subheader("📝 Comentarios por Sesión")
-    for idx, row in df_asesor.iterrows():
-        comentario = row['Detalles o Comentarios Adicionales']
-        if pd.isna(comentario) or comentario.strip() == '':
-            comentario = "_No hay comentarios._"
-        fecha_str = row['Fecha de Capa'].strftime('%d-%m-%Y')
-        st.markdown(f"**Sesión del {fecha_str} (Evaluador: {row['Evaluador']}):** {comentario}")
+    # Fragmento: cambiar de página solo vuelve a ejecutar los comentarios
+    @st.fragment
+    def comentarios_por_sesion(df_asesor, asesor_seleccionado):
+        with medicion.fragmento('comentarios', asesor=asesor_seleccionado), medicion.etapa('comentarios'):
+            inicio, fin = paginar(len(df_asesor), f"comentarios_{asesor_seleccionado}")
+            pagina = df_asesor.iloc[inicio:fin]
+            comentarios = texto_o_vacio(pagina['Detalles o Comentarios Adicionales'], "_No hay comentarios._")
+            fechas = formatear_fecha(pagina['Fecha de Capa'], '%d-%m-%Y')
+            evaluadores = pagina['Evaluador'].astype(str)
+            mostrar_lineas("**Sesión del " + fechas + " (Evaluador: " + evaluadores + "):** " + comentarios)
+
+    comentarios_por_sesion(df_asesor, asesor_seleccionado)
 
     st.markdown("---")
 
     # Resumen Mandamientos No Cumplidos
     st.subheader("⚠️ Mandamientos No Cumplidos - Resumen")
-    mandamientos = df_asesor['¿Cuál o cuáles mandamientos NO cumple?'].dropna()
-    if mandamientos.empty:
+    # Frecuencias a partir de la matriz de mandamientos precalculada al cargar
+    with medicion.etapa('agregado'):
+        resumen_df = conjunto.mandamientos.frecuencias(*conjunto.indice.rango(asesor_seleccionado))
+    if resumen_df.empty:
         st.info("No hay registros de mandamientos no cumplidos para este asesor.")
     else:
-        # Dividir por comas o punto y coma, quitar espacios
-        mandamientos_list = mandamientos.str.split('[,;]').explode().str.strip()
-        conteo = Counter(mandamientos_list)
-        resumen_df = pd.DataFrame(conteo.items(), columns=['Mandamiento', 'Frecuencia']).sort_values(by='Frecuencia', ascending=False)
-        st.table(resumen_df.reset_index(drop=True))
\ No newline at end of file
+        st.table(resumen_df)
+
+    # Comparación con el resto de asesores: % de sesiones que no cumple cada
+    # mandamiento. No depende del asesor elegido; como fragmento, marcar la
+    # casilla solo ejecuta esta sección
+    @st.fragment
+    def comparacion_asesores():
+        with medicion.fragmento('comparacion'):
+            if st.checkbox("Comparar con todos los asesores"):
+                with medicion.etapa('agregado'):
+                    conteos = conjunto.mandamientos.por_asesor(conjunto.indice)
+                    sesiones = conjunto.indice.sesiones_por_asesor()
+                    comparacion = conteos.div(sesiones, axis=0).mul(100).round(1)
+                    comparacion.loc['Organización'] = (conteos.sum() / sesiones.sum() * 100).round(1)
+                st.dataframe(comparacion.style.format("{:.1f}%"), height=400)
+
+    comparacion_asesores()
+
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar(asesor=asesor_seleccionado)
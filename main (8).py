@@ -1,37 +1,55 @@
 import streamlit as st
-import pandas as pd
+import plotly.express as px
+import os
+
+from agregados import FRECUENCIAS
+from datos import LIBROS, obtener_conjunto
+from graficos import cache_figuras
+from instrumentacion import iniciar_medicion
+from precarga import estado_precarga
+from vistas import mostrar_detalle_sesiones
 
 st.set_page_config(page_title="Dashboard Capacitación", layout="wide")
 
-@st.cache_data
-def cargar_datos():
-    df = pd.read_excel('Entrenamiento_R3.xlsx')
-    df['Fecha de Capa'] = pd.to_datetime(df['Fecha de Capa'], errors='coerce')
-    return df
+# Nombre del script, parte de la clave de los gráficos en la caché compartida
+SCRIPT = os.path.basename(__file__)
+
+# Tiempos por etapa del rerun, solo si se activan (ver instrumentacion.py)
+medicion = iniciar_medicion(SCRIPT)
 
-def mostrar_valor(valor):
-    if pd.isna(valor):
-        return "No disponible"
-    if isinstance(valor, str) and valor.strip() == '':
-        return "No disponible"
-    return valor
+# Columnas del Excel que usa esta vista; las demás no se leen
+COLUMNAS = [
+    'Evaluador', 'Fecha de Capa', 'Duración de Capa',
+    'Presentación', 'Nivel de Expertise en Presentación',
+    'Sondeo', 'Nivel de Expertise en Sondeo',
+    'Argumentación', 'Nivel de Expertise en Argumentación',
+    'Rebate', 'Nivel de Expertise en Rebate',
+    'Cierre', 'Nivel de Expertise en Cierre',
+    '¿Cumple los 6 Mandamientos de la Venta Carrión?',
+    '¿Cuál o cuáles mandamientos NO cumple?',
+    'Detalles o Comentarios Adicionales'
+]
 
-df = cargar_datos()
+# Dataset compartido por todas las sesiones; se recarga solo si cambia el Excel
+with medicion.etapa('carga'), estado_precarga():
+    conjunto = obtener_conjunto(LIBROS, COLUMNAS)
 
 st.title("📋 Informe de Capacitación por Asesor Evaluado")
 
-asesores = df['Asesor Evaluado'].dropna().unique()
-asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", sorted(asesores))
+asesor_seleccionado = st.selectbox("🔍 Selecciona el Asesor Evaluado:", conjunto.indice.asesores())
 
-df_asesor = df[df['Asesor Evaluado'] == asesor_seleccionado].sort_values('Fecha de Capa')
+with medicion.etapa('filtro'):
+    df_asesor = conjunto.indice.sesiones(asesor_seleccionado)
 
 if df_asesor.empty:
     st.warning("⚠️ No hay datos para el asesor seleccionado.")
 else:
     # Resumen general
-    total_sesiones = len(df_asesor)
-    duracion_total = df_asesor['Duración de Capa'].sum()
-    duracion_media = df_asesor['Duración de Capa'].mean()
+    with medicion.etapa('agregado'):
+        resumen = conjunto.cubo.resumen(asesor_seleccionado)
+    total_sesiones = resumen['sesiones']
+    duracion_total = resumen['duracion_total']
+    duracion_media = resumen['duracion_media']
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Sesiones Totales", total_sesiones)
@@ -40,40 +58,70 @@ else:
 
     st.markdown("---")
 
-    # Gráfico 1: Sesiones por fecha
-    sesiones_por_fecha = df_asesor.groupby('Fecha de Capa').size().reset_index(name='Cantidad de Sesiones')
-    fig_sesiones = px.bar(
-        sesiones_por_fecha,
-        x='Fecha de Capa',
-        y='Cantidad de Sesiones',
-        title="Número de Sesiones por Fecha",
-        labels={'Cantidad de Sesiones': 'Cantidad', 'Fecha de Capa': 'Fecha'}
-    )
-    st.plotly_chart(fig_sesiones, use_container_width=True)
-
-    # Gráfico 2: Duración total por fecha
-    duracion_por_fecha = df_asesor.groupby('Fecha de Capa')['Duración de Capa'].sum().reset_index()
-    fig_duracion = px.bar(
-        duracion_por_fecha,
-        x='Fecha de Capa',
-        y='Duración de Capa',
-        title="Duración Total de Sesiones por Fecha (minutos)",
-        labels={'Duración de Capa': 'Duración (min)', 'Fecha de Capa': 'Fecha'}
-    )
-    st.plotly_chart(fig_duracion, use_container_width=True)
+    # Gráficos 1 y 2 en un fragmento: cambiar la agrupación solo vuelve a
+    # ejecutar esta sección, no el resto del informe
+    @st.fragment
+    def graficos_por_fecha(asesor_seleccionado):
+        with medicion.fragmento('graficos por fecha', asesor=asesor_seleccionado):
+            # Gráfico 1: Sesiones por fecha
+            frecuencia = st.radio(
+                "Agrupar por:", list(FRECUENCIAS), format_func=FRECUENCIAS.get, horizontal=True
+            )
+            with medicion.etapa('agregado'):
+                por_fecha = conjunto.cubo.serie(asesor_seleccionado, frecuencia)
+            sesiones_por_fecha = por_fecha.rename(columns={'sesiones': 'Cantidad de Sesiones'})
+            def construir_fig_sesiones():
+                fig_sesiones = px.bar(
+                    sesiones_por_fecha,
+                    x='Fecha de Capa',
+                    y='Cantidad de Sesiones',
+                    title="Número de Sesiones por Fecha",
+                    labels={'Cantidad de Sesiones': 'Cantidad', 'Fecha de Capa': 'Fecha'}
+                )
+                return fig_sesiones
+
+            with medicion.etapa('figuras'):
+                fig_sesiones = cache_figuras.obtener((SCRIPT, 'fig_sesiones', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_sesiones)
+            st.plotly_chart(fig_sesiones, use_container_width=True)
+
+            # Gráfico 2: Duración total por fecha
+            duracion_por_fecha = por_fecha.rename(columns={'duracion_total': 'Duración de Capa'})
+            def construir_fig_duracion():
+                fig_duracion = px.bar(
+                    duracion_por_fecha,
+                    x='Fecha de Capa',
+                    y='Duración de Capa',
+                    title="Duración Total de Sesiones por Fecha (minutos)",
+                    labels={'Duración de Capa': 'Duración (min)', 'Fecha de Capa': 'Fecha'}
+                )
+                return fig_duracion
+
+            with medicion.etapa('figuras'):
+                fig_duracion = cache_figuras.obtener((SCRIPT, 'fig_duracion', asesor_seleccionado, None, conjunto.version, frecuencia), construir_fig_duracion)
+            st.plotly_chart(fig_duracion, use_container_width=True)
+
+    graficos_por_fecha(asesor_seleccionado)
 
     # Gráfico 3: Conteo respuestas Mandamientos
     mandamientos = df_asesor['¿Cumple los 6 Mandamientos de la Venta Carrión?'].dropna()
     if not mandamientos.empty:
-        conteo_mandamientos = mandamientos.value_counts().reset_index()
-        conteo_mandamientos.columns = ['Respuesta', 'Frecuencia']
-        fig_mandamientos = px.bar(
-            conteo_mandamientos,
-            x='Respuesta',
-            y='Frecuencia',
-            title="Distribución de respuestas a '¿Cumple los 6 Mandamientos de la Venta Carrión?'",
-            labels={'Frecuencia': 'Cantidad', 'Respuesta': 'Respuesta'}
-        )
+        # Con respuestas categóricas, value_counts incluye las categorías sin uso
+        with medicion.etapa('agregado'):
+            conteo_mandamientos = mandamientos.value_counts()
+            conteo_mandamientos = conteo_mandamientos[conteo_mandamientos > 0].reset_index()
+            conteo_mandamientos.columns = ['Respuesta', 'Frecuencia']
+        def construir_fig_mandamientos():
+            fig_mandamientos = px.bar(
+                conteo_mandamientos,
+                x='Respuesta',
+                y='Frecuencia',
+                title="Distribución de respuestas a '¿Cumple los 6 Mandamientos de la Venta Carrión?'",
+                labels={'Frecuencia': 'Cantidad', 'Respuesta': 'Respuesta'}
+            )
+            return fig_mandamientos
+
+        with medicion.etapa('figuras'):
+            fig_mandamientos = cache_figuras.obtener((SCRIPT, 'fig_mandamientos', asesor_seleccionado, None, conjunto.version), construir_fig_mandamientos)
         st.plotly_chart(fig_mandamientos, use_container_width=True)
     else:
         st.info("No hay datos para '¿Cumple los 6 Mandamientos de la Venta Carrión?'.")
@@ -81,16 +129,23 @@ else:
     st.markdown("---")
 
     # Mostrar detalle textual por sesión sin gráficos de criterios
-    for idx, row in df_asesor.iterrows():
-        fecha_str = row['Fecha de Capa'].strftime('%d-%m-%Y') if pd.notna(row['Fecha de Capa']) else "Fecha desconocida"
-        with st.expander(f"Sesión del {fecha_str} - Evaluador: {mostrar_valor(row.get('Evaluador'))} - Duración: {mostrar_valor(row.get('Duración de Capa'))} min"):
-            st.markdown(f"**Presentación:** {mostrar_valor(row.get('Nivel de Expertise en Presentación'))}")
-            st.markdown(f"**Sondeo:** {mostrar_valor(row.get('Nivel de Expertise en Sondeo'))}")
-            st.markdown(f"**Argumentación:** {mostrar_valor(row.get('Nivel de Expertise en Argumentación'))}")
-            st.markdown(f"**Rebate:** {mostrar_valor(row.get('Nivel de Expertise en Rebate'))}")
-            st.markdown(f"**Cierre:** {mostrar_valor(row.get('Nivel de Expertise en Cierre'))}")
-            st.markdown(f"**¿Cumple los 6 Mandamientos de la Venta Carrión?:** {mostrar_valor(row.get('¿Cumple los 6 Mandamientos de la Venta Carrión?'))}")
-            st.markdown(f"**¿Cuál o cuáles mandamientos NO cumple?:** {mostrar_valor(row.get('¿Cuál o cuáles mandamientos NO cumple?'))}")
-            comentarios = mostrar_valor(row.get('Detalles o Comentarios Adicionales'))
-            st.markdown(f"**Comentarios adicionales:** {comentarios}")
-            st.markdown("---")
\ No newline at end of file
+    campos = [
+        ('Presentación', 'Nivel de Expertise en Presentación'),
+        ('Sondeo', 'Nivel de Expertise en Sondeo'),
+        ('Argumentación', 'Nivel de Expertise en Argumentación'),
+        ('Rebate', 'Nivel de Expertise en Rebate'),
+        ('Cierre', 'Nivel de Expertise en Cierre'),
+        ('¿Cumple los 6 Mandamientos de la Venta Carrión?', '¿Cumple los 6 Mandamientos de la Venta Carrión?'),
+        ('¿Cuál o cuáles mandamientos NO cumple?', '¿Cuál o cuáles mandamientos NO cumple?'),
+        ('Comentarios adicionales', 'Detalles o Comentarios Adicionales'),
+    ]
+    # Fragmento: cambiar de página solo vuelve a ejecutar el detalle
+    @st.fragment
+    def detalle_sesiones(df_asesor, asesor_seleccionado):
+        with medicion.fragmento('detalle de sesiones', asesor=asesor_seleccionado), medicion.etapa('detalle de sesiones'):
+            mostrar_detalle_sesiones(df_asesor, campos, f"detalle_{asesor_seleccionado}")
+
+    detalle_sesiones(df_asesor, asesor_seleccionado)
+
+# Panel de tiempos en la barra lateral y registro en el log (si está activada)
+medicion.cerrar(asesor=asesor_seleccionado)
@@ -0,0 +1,97 @@
+import ast
+import glob
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from datos import LIBROS, obtener_conjunto, proyeccion
+
+# Precarga de los datos al arrancar el servidor. servidor.py la inicia en un
+# hilo antes de levantar Streamlit en el mismo proceso, así que el primer
+# usuario ya encuentra el dataset, los índices (también el de búsqueda de
+# texto) y el ranking en memoria. Una sesión que llega durante la precarga
+# espera en el lock de obtener_conjunto a que termine la carga compartida en
+# lugar de hacer la suya
+
+logger = logging.getLogger(__name__)
+
+_estado = {'iniciada': False, 'lista': False, 'error': None, 'segundos': None}
+_lock_estado = threading.Lock()
+
+
+def scripts_dashboard(carpeta='.'):
+    return sorted(glob.glob(os.path.join(carpeta, 'main (*).py')))
+
+
+def columnas_script(ruta):
+    # Lista COLUMNAS que declara el script, leída sin ejecutarlo
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read(), ruta)
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'COLUMNAS' for t in nodo.targets):
+            return ast.literal_eval(nodo.value)
+    return None
+
+
+def _precargar(ruta, proyecciones):
+    inicio = time.perf_counter()
+    try:
+        for columnas in proyecciones:
+            # Dataset, índice, cubo, matriz de mandamientos e índice de texto se
+            # arman al cargar; el ranking es lo único perezoso
+            obtener_conjunto(ruta, columnas).ranking()
+    except Exception as error:
+        logger.exception("Falló la precarga de %s", ruta)
+        with _lock_estado:
+            _estado['error'] = str(error)
+        return
+    segundos = time.perf_counter() - inicio
+    logger.info("Precarga de %s lista: %d proyecciones en %.1f s", ruta, len(proyecciones), segundos)
+    with _lock_estado:
+        _estado['lista'] = True
+        _estado['segundos'] = segundos
+
+
+def iniciar_precarga(ruta=LIBROS, scripts=None):
+    # Una sola vez por proceso; devuelve el hilo, o None si ya se había iniciado
+    with _lock_estado:
+        if _estado['iniciada']:
+            return None
+        _estado['iniciada'] = True
+    scripts = scripts_dashboard() if scripts is None else scripts
+    # Una carga por proyección distinta (varios scripts piden las mismas columnas)
+    proyecciones = {}
+    for script in scripts:
+        columnas = columnas_script(script)
+        proyecciones.setdefault(None if columnas is None else tuple(proyeccion(columnas)), columnas)
+    hilo = threading.Thread(target=_precargar, args=(ruta, list(proyecciones.values())), name='precarga', daemon=True)
+    hilo.start()
+    return hilo
+
+
+@contextmanager
+def estado_precarga():
+    # Rodea la carga del script. Sin precarga (streamlit run directo) no muestra
+    # nada; si la precarga sigue en curso avisa que la vista la está esperando
+    # y al terminar la carga pasa a indicar que los datos están en memoria
+    with _lock_estado:
+        estado = dict(_estado)
+    if not estado['iniciada']:
+        yield
+        return
+    indicador = st.sidebar.empty()
+    if estado['error'] is not None:
+        indicador.caption("🔴 Falló la precarga; los datos se cargan al abrir la vista")
+    elif not estado['lista']:
+        indicador.caption("🟡 Precargando datos… esta vista espera esa carga")
+    yield
+    with _lock_estado:
+        estado = dict(_estado)
+    if estado['lista']:
+        indicador.caption(f"🟢 Datos en memoria (precargados en {estado['segundos']:.1f} s)")
+    elif estado['error'] is None:
+        indicador.caption("🟢 Datos de esta vista en memoria; sigue la precarga de las demás")
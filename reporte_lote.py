@@ -0,0 +1,220 @@
+import argparse
+import html
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+from datos import LIBROS, obtener_conjunto
+from exportacion import nombre_archivo
+from informe_asesor import CAMPOS_DETALLE, figura_duracion, figura_sesiones, tabla_evaluadores
+from vistas import titulos_detalle, valores_visibles
+
+# Informe estático por asesor, el mismo de main (10).py, generado para todos
+# los asesores en paralelo. plotly.js y los estilos se escriben una sola vez
+# en la carpeta de salida y cada informe los referencia
+
+COLUMNAS = [columna for _, columna in CAMPOS_DETALLE]
+
+ARCHIVO_PLOTLY = 'plotly.min.js'
+ARCHIVO_ESTILOS = 'reporte.css'
+
+ESTILOS = """
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; color: #111111; margin: 2rem 3rem; }
+.metricas { display: flex; gap: 2rem; margin: 1rem 0; }
+.metrica { border: 1px solid #dddddd; border-radius: 8px; padding: 0.75rem 1.25rem; }
+.metrica .valor { font-size: 1.6rem; font-weight: bold; }
+table { border-collapse: collapse; font-size: 0.9rem; }
+th, td { border: 1px solid #dddddd; padding: 0.3rem 0.6rem; text-align: left; }
+details { border-bottom: 1px solid #eeeeee; padding: 0.4rem 0; }
+summary { cursor: pointer; font-weight: 600; }
+"""
+
+logger = logging.getLogger(__name__)
+
+# Estado de cada proceso trabajador, cargado una vez por proceso
+_trabajador = {}
+
+
+def _iniciar_trabajador(ruta, desde, hasta, salida):
+    # Con fork el conjunto ya está en memoria (se heredó del proceso principal);
+    # con spawn se lee de la copia columnar que dejó el proceso principal
+    _trabajador['conjunto'] = obtener_conjunto(ruta, COLUMNAS)
+    _trabajador['desde'] = desde
+    _trabajador['hasta'] = hasta
+    _trabajador['salida'] = salida
+
+
+def _detalle_html(df):
+    titulos = titulos_detalle(df).map(html.escape)
+    valores = valores_visibles(df, COLUMNAS)
+    cuerpo = pd.Series("", index=df.index)
+    for etiqueta, columna in CAMPOS_DETALLE:
+        texto = valores[columna].map(html.escape).str.replace("\n", "<br>", regex=False)
+        cuerpo = cuerpo + f"<p><strong>{html.escape(etiqueta)}:</strong> " + texto + "</p>"
+    return "\n".join("<details><summary>" + titulos + "</summary>" + cuerpo + "</details>")
+
+
+def etiqueta_periodo(desde, hasta):
+    # Cada límite por separado: se puede dar solo uno de los dos
+    if desde is None and hasta is None:
+        return "todo el historial"
+    if hasta is None:
+        return f"desde el {pd.Timestamp(desde):%d-%m-%Y}"
+    if desde is None:
+        return f"hasta el {pd.Timestamp(hasta):%d-%m-%Y}"
+    return f"{pd.Timestamp(desde):%d-%m-%Y} a {pd.Timestamp(hasta):%d-%m-%Y}"
+
+
+def _metrica(etiqueta, valor):
+    return f'<div class="metrica"><div>{etiqueta}</div><div class="valor">{valor}</div></div>'
+
+
+def informe_html(conjunto, asesor, desde, hasta):
+    df_asesor = conjunto.indice.sesiones(asesor, desde, hasta)
+    resumen = conjunto.cubo.resumen(asesor, desde, hasta)
+    por_fecha = conjunto.cubo.serie(asesor, 'D', desde, hasta)
+    figuras = "\n".join(
+        fig.to_html(full_html=False, include_plotlyjs=False, default_height='450px')
+        for fig in (figura_sesiones(por_fecha), figura_duracion(por_fecha))
+    )
+    periodo = etiqueta_periodo(desde, hasta)
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Informe de Capacitación - {html.escape(str(asesor))}</title>
+<script src="{ARCHIVO_PLOTLY}"></script>
+<link rel="stylesheet" href="{ARCHIVO_ESTILOS}">
+</head>
+<body>
+<p><a href="index.html">&larr; Todos los asesores</a></p>
+<h1>📋 Informe de Capacitación por Asesor Evaluado</h1>
+<h2>{html.escape(str(asesor))}</h2>
+<p>Periodo: {periodo}</p>
+<div class="metricas">
+{_metrica("Sesiones Totales", resumen['sesiones'])}
+{_metrica("Duración Total (minutos)", f"{resumen['duracion_total']:.1f}")}
+{_metrica("Duración Media (minutos)", f"{resumen['duracion_media']:.1f}")}
+</div>
+<hr>
+{figuras}
+<h2>Evaluadores y detalles de las sesiones</h2>
+{tabla_evaluadores(df_asesor).to_html(index=False, na_rep="", border=0)}
+<hr>
+<h2>Detalle por sesión y criterios evaluados</h2>
+{_detalle_html(df_asesor)}
+</body>
+</html>
+"""
+
+
+def _generar_lote(tareas):
+    # tareas: lista de (asesor, archivo); devuelve (asesor, archivo, sesiones, puntaje medio)
+    conjunto = _trabajador['conjunto']
+    desde, hasta, salida = _trabajador['desde'], _trabajador['hasta'], _trabajador['salida']
+    resultados = []
+    for asesor, archivo in tareas:
+        with open(os.path.join(salida, archivo), 'w', encoding='utf-8') as f:
+            f.write(informe_html(conjunto, asesor, desde, hasta))
+        resumen = conjunto.cubo.resumen(asesor, desde, hasta)
+        resultados.append((asesor, archivo, resumen['sesiones'], resumen['puntaje_medio']))
+    return resultados
+
+
+def _escribir_recursos(salida):
+    with open(os.path.join(salida, ARCHIVO_PLOTLY), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+    with open(os.path.join(salida, ARCHIVO_ESTILOS), 'w', encoding='utf-8') as f:
+        f.write(ESTILOS)
+
+
+def _escribir_indice(salida, resultados, desde, hasta):
+    periodo = etiqueta_periodo(desde, hasta)
+    # Sin ninguna sesión puntuada en el periodo el puntaje queda en blanco
+    filas = "\n".join(
+        f'<tr><td><a href="{archivo}">{html.escape(str(asesor))}</a></td><td>{sesiones}</td>'
+        f'<td>{"" if pd.isna(puntaje) else f"{puntaje:.2f}"}</td></tr>'
+        for asesor, archivo, sesiones, puntaje in resultados
+    )
+    with open(os.path.join(salida, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>Informes por asesor</title><link rel="stylesheet" href="{ARCHIVO_ESTILOS}"></head>
+<body>
+<h1>📋 Informes de Capacitación por Asesor Evaluado</h1>
+<p>Periodo: {periodo} - {len(resultados)} asesores con sesiones</p>
+<table><tr><th>Asesor Evaluado</th><th>Sesiones</th><th>Puntaje Promedio</th></tr>
+{filas}
+</table>
+</body>
+</html>
+""")
+
+
+def periodo_semanal(conjunto, dias=7):
+    # Los últimos 'dias' días hasta la fecha más reciente del dataset
+    hasta = conjunto.rango_fechas()[1].normalize()
+    return hasta - pd.Timedelta(days=dias - 1), hasta
+
+
+def generar_reportes(ruta=LIBROS, salida='reportes', desde=None, hasta=None, procesos=None):
+    conjunto = obtener_conjunto(ruta, COLUMNAS)
+    os.makedirs(salida, exist_ok=True)
+    _escribir_recursos(salida)
+
+    # Solo los asesores con sesiones en el periodo; nombres de archivo únicos
+    tareas = []
+    usados = set()
+    for asesor in conjunto.indice.asesores():
+        inicio, fin = conjunto.indice.rango(asesor, desde, hasta)
+        if fin == inicio:
+            continue
+        base = nombre_archivo(asesor)
+        archivo = base + '.html'
+        sufijo = 1
+        while archivo in usados:
+            sufijo += 1
+            archivo = f"{base}_{sufijo}.html"
+        usados.add(archivo)
+        tareas.append((asesor, archivo))
+
+    procesos = procesos or os.cpu_count() or 1
+    # Varios asesores por tarea para repartir el trabajo sin pagar un viaje
+    # entre procesos por informe
+    tamano = max(1, len(tareas) // (procesos * 4))
+    lotes = [tareas[i:i + tamano] for i in range(0, len(tareas), tamano)]
+    with ProcessPoolExecutor(
+        max_workers=procesos, initializer=_iniciar_trabajador, initargs=(ruta, desde, hasta, salida)
+    ) as ejecutor:
+        resultados = [resultado for lote in ejecutor.map(_generar_lote, lotes) for resultado in lote]
+
+    _escribir_indice(salida, resultados, desde, hasta)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un informe HTML por asesor evaluado")
+    parser.add_argument('--archivo', default=LIBROS, help="Libro, patrón o carpeta con un libro por ronda")
+    parser.add_argument('--salida', default='reportes')
+    parser.add_argument('--desde', help="Fecha inicial (AAAA-MM-DD); por defecto los últimos 7 días con datos")
+    parser.add_argument('--hasta', help="Fecha final (AAAA-MM-DD)")
+    parser.add_argument('--todo', action='store_true', help="Todo el historial en lugar de la última semana")
+    parser.add_argument('--procesos', type=int, help="Procesos en paralelo; por defecto uno por CPU")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    inicio = time.perf_counter()
+    desde = pd.Timestamp(args.desde) if args.desde else None
+    hasta = pd.Timestamp(args.hasta) if args.hasta else None
+    if not args.todo and desde is None and hasta is None:
+        desde, hasta = periodo_semanal(obtener_conjunto(args.archivo, COLUMNAS))
+    resultados = generar_reportes(args.archivo, args.salida, desde, hasta, args.procesos)
+    print(f"{len(resultados)} informes en {args.salida}/ ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import logging
+import sys
+
+from streamlit.web import cli as stcli
+
+from datos import LIBROS
+from precarga import iniciar_precarga
+
+# Arranca Streamlit en este mismo proceso después de iniciar la precarga de
+# los datos en segundo plano, para que el primer usuario no pague la lectura
+# del Excel. Se precargan los libros que leerán las vistas (datos.LIBROS, que
+# se elige con DASHBOARD_LIBROS) con las columnas del script que se sirve. Uso:
+#   python servidor.py "main (5).py" [opciones de streamlit run]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Levanta un dashboard con los datos precargados")
+    parser.add_argument('script', help="Script del dashboard, por ejemplo 'main (5).py'")
+    args, opciones_streamlit = parser.parse_known_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    iniciar_precarga(LIBROS, scripts=[args.script])
+    sys.argv = ['streamlit', 'run', args.script, *opciones_streamlit]
+    sys.exit(stcli.main())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datos
+from generar_sinteticos import escribir_excel, generar
+
+# La ingesta incremental (datos._actualizar_conjunto con un conjunto previo)
+# debe dejar exactamente lo mismo que una carga completa de los mismos archivos:
+# tabla, índice, cubo, matriz de mandamientos e índice de texto
+
+
+def _actualizar(ruta, actual=None):
+    carpeta = os.path.join(os.path.dirname(ruta), datos.DIR_ENTRANTES)
+    return datos._actualizar_conjunto(actual, ruta, datos.version_archivo(ruta), datos.listar_entrantes(carpeta))
+
+
+def _por_id(conjunto):
+    return conjunto.df.sort_values('ID').reset_index(drop=True)
+
+
+def _postings(conjunto):
+    # (término, ID, columnas) de cada entrada del índice de texto
+    texto = conjunto.texto
+    ids = conjunto.df['ID'].to_numpy()[texto.filas]
+    tokens = np.repeat(texto.vocabulario, np.diff(texto.inicios))
+    return sorted(zip(tokens.tolist(), ids.tolist(), texto.mascaras.tolist()))
+
+
+def comparar(incremental, completo):
+    pd.testing.assert_frame_equal(_por_id(incremental), _por_id(completo), check_categorical=False)
+    assert incremental.indice.rangos == completo.indice.rangos
+    for frecuencia, nivel in completo.cubo.niveles.items():
+        claves = [nivel.col_asesor, nivel.col_fecha]
+        a = incremental.cubo.niveles[frecuencia].tabla.sort_values(claves).reset_index(drop=True)
+        b = nivel.tabla.sort_values(claves).reset_index(drop=True)
+        pd.testing.assert_frame_equal(a, b, check_categorical=False, check_dtype=False)
+    conteos_a = incremental.mandamientos.por_asesor(incremental.indice)
+    conteos_b = completo.mandamientos.por_asesor(completo.indice)
+    conteos_a = conteos_a.loc[:, conteos_a.sum() > 0]
+    pd.testing.assert_frame_equal(conteos_a.sort_index(axis=1), conteos_b.sort_index(axis=1))
+    assert _postings(incremental) == _postings(completo)
+    pd.testing.assert_series_equal(incremental.hashes.sort_index(), completo.hashes.sort_index())
+    assert incremental.version == completo.version
+
+
+@pytest.fixture
+def libro(tmp_path):
+    df = generar(300, semilla=1)
+    ruta = str(tmp_path / 'Entrenamiento.xlsx')
+    escribir_excel(df, ruta)
+    return df, ruta
+
+
+def _reescribir(df, ruta):
+    escribir_excel(df, ruta)
+    # Que el cambio se note aunque caiga en el mismo tick del reloj de archivos
+    os.utime(ruta, ns=(os.stat(ruta).st_atime_ns, os.stat(ruta).st_mtime_ns + 10**9))
+
+
+def _nuevas(df, cantidad, desde_id, asesor=None):
+    filas = df.sample(cantidad, random_state=desde_id).copy()
+    filas['ID'] = np.arange(desde_id, desde_id + cantidad)
+    if asesor is not None:
+        filas['Asesor Evaluado'] = asesor
+    return filas
+
+
+def test_ediciones_y_filas_nuevas_del_libro(libro):
+    df, ruta = libro
+    conjunto = _actualizar(ruta)
+    df = df.copy()
+    df.loc[df['ID'] == 5, 'Duración de Capa'] = 99.5
+    df.loc[df['ID'] == 7, 'Detalles o Comentarios Adicionales'] = 'Objeción mal rebatida'
+    df.loc[df['ID'] == 9, 'Asesor Evaluado'] = df['Asesor Evaluado'].iloc[-1]
+    df = pd.concat([df, _nuevas(df, 20, 301), _nuevas(df, 3, 321, asesor='Zapata Nuevo, Asesor')], ignore_index=True)
+    _reescribir(df, ruta)
+    incremental = _actualizar(ruta, conjunto)
+    assert incremental.indice.rangos['Zapata Nuevo, Asesor'][1] - incremental.indice.rangos['Zapata Nuevo, Asesor'][0] == 3
+    comparar(incremental, _actualizar(ruta))
+
+
+def test_archivos_entrantes(libro):
+    df, ruta = libro
+    conjunto = _actualizar(ruta)
+    carpeta = os.path.join(os.path.dirname(ruta), datos.DIR_ENTRANTES)
+    os.makedirs(carpeta)
+    correccion = df[df['ID'].isin([1, 2])].copy()
+    correccion['Duración de Capa'] = 777.0
+    nuevas = _nuevas(df, 5, 1000, asesor='Aguilar Entrante, Ana')
+    pd.concat([correccion, nuevas]).to_csv(os.path.join(carpeta, 'correcciones.csv'), index=False)
+    incremental = _actualizar(ruta, conjunto)
+    comparar(incremental, _actualizar(ruta))
+    assert (incremental.df.loc[incremental.df['ID'].isin([1, 2]), 'Duración de Capa'] == 777.0).all()
+
+
+def test_correccion_entrante_sobrevive_cambio_del_libro(libro):
+    # La corrección de un archivo entrante no se pierde cuando después cambia
+    # el libro en otra fila
+    df, ruta = libro
+    carpeta = os.path.join(os.path.dirname(ruta), datos.DIR_ENTRANTES)
+    os.makedirs(carpeta)
+    correccion = df[df['ID'] == 1].copy()
+    correccion['Duración de Capa'] = 777.0
+    correccion.to_csv(os.path.join(carpeta, 'correccion.csv'), index=False)
+    conjunto = _actualizar(ruta)
+    _reescribir(pd.concat([df, _nuevas(df, 1, 301)], ignore_index=True), ruta)
+    incremental = _actualizar(ruta, conjunto)
+    comparar(incremental, _actualizar(ruta))
+    assert incremental.df.loc[incremental.df['ID'] == 1, 'Duración de Capa'].item() == 777.0
+
+
+def test_informe_acumula_filas_fallidas(libro):
+    # Las filas que no se pudieron convertir en la carga anterior se conservan
+    # y las del delta se numeran a continuación de las filas previas
+    df, ruta = libro
+    df = df.astype({'Duración de Capa': object})
+    df.loc[df['ID'] == 3, 'Duración de Capa'] = 'sin dato'
+    _reescribir(df, ruta)
+    conjunto = _actualizar(ruta)
+    previas = conjunto.informe['filas_fallidas']['Duración de Capa']
+    assert len(previas) == 1
+    nuevas = _nuevas(df[df['ID'] != 3], 2, 301)
+    nuevas.loc[nuevas['ID'] == 302, 'Duración de Capa'] = 'otro'
+    _reescribir(pd.concat([df, nuevas], ignore_index=True), ruta)
+    incremental = _actualizar(ruta, conjunto)
+    assert incremental.informe['filas_fallidas']['Duración de Capa'] == previas + [len(conjunto.df) + 1]
+    assert incremental.informe['memoria_antes'] > conjunto.informe['memoria_antes']
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen
+import datos
+from generar_sinteticos import escribir_excel, generar
+
+# Un rango de fechas del dashboard son días completos: las sesiones de la
+# tabla (índice) y las métricas (cubo, agrupado por día) cubren las mismas filas
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    df = generar(300, semilla=4)
+    # Sesiones a distintas horas del día
+    horas = np.random.default_rng(4).integers(0, 86_400, len(df))
+    df['Fecha de Capa'] = df['Fecha de Capa'] + pd.to_timedelta(horas, unit='s')
+    ruta = str(tmp_path / 'Entrenamiento.xlsx')
+    escribir_excel(df, ruta)
+    return ruta
+
+
+@pytest.mark.parametrize('obtener', [datos.obtener_conjunto, almacen.obtener_almacen])
+def test_tabla_y_metricas_cubren_los_mismos_dias(ruta, obtener):
+    conjunto = obtener(ruta, None)
+    desde, hasta = pd.Timestamp('2025-01-05').date(), pd.Timestamp('2025-01-20').date()
+    for asesor in conjunto.indice.asesores():
+        df_asesor = conjunto.indice.sesiones(asesor)
+        fechas = df_asesor['Fecha de Capa'].dt.normalize()
+        esperadas = int(((fechas >= pd.Timestamp(desde)) & (fechas <= pd.Timestamp(hasta))).sum())
+        assert len(conjunto.indice.sesiones(asesor, desde, hasta)) == esperadas
+        assert conjunto.cubo.resumen(asesor, desde, hasta)['sesiones'] == esperadas
+        assert int(conjunto.cubo.serie(asesor, 'D', desde, hasta)['sesiones'].sum()) == esperadas
@@ -0,0 +1,31 @@
+import os
+import sys
+import types
+
+from streamlit.testing.v1 import AppTest
+
+import datos
+from generar_sinteticos import escribir_excel, generar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_rondas_sin_copia_columnar_desde_streamlit(tmp_path, monkeypatch):
+    # Varias rondas sin copia columnar se parsean en procesos aparte. Bajo
+    # Streamlit el __main__ es el script del dashboard: los trabajadores no
+    # deben volver a ejecutarlo
+    for ronda, semilla in [(1, 1), (2, 2), (3, 3)]:
+        escribir_excel(generar(200, semilla), str(tmp_path / f'Entrenamiento_R{ronda}.xlsx'))
+    script = os.path.join(RAIZ, 'main (5).py')
+    # Como en 'streamlit run': __main__ apunta al script, sin __spec__
+    principal = types.ModuleType('__main__')
+    principal.__file__ = script
+    principal.__spec__ = None
+    monkeypatch.setitem(sys.modules, '__main__', principal)
+    # Los trabajadores leen la ruta del entorno, como el servidor real
+    monkeypatch.setenv(datos.VARIABLE_LIBROS, str(tmp_path))
+    monkeypatch.setattr(datos, 'LIBROS', str(tmp_path))
+    at = AppTest.from_file(script, default_timeout=120).run()
+    assert not at.exception, [e.value for e in at.exception]
+    conjunto = datos.obtener_conjunto(str(tmp_path), None)
+    assert conjunto.df['Ronda'].value_counts().to_dict() == {'R1': 200, 'R2': 200, 'R3': 200}
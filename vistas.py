@@ -0,0 +1,114 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+from agregados import ESTADOS_TENDENCIA, POR_UNIDAD
+from exportacion import FORMATOS, MIME, exportar
+
+# Sesiones por página en los listados largos (comentarios, detalle por sesión)
+POR_PAGINA = 25
+
+# Filas por página de las tablas paginadas
+FILAS_POR_PAGINA = 50
+
+
+def paginar(total, clave, por_pagina=POR_PAGINA):
+    # Devuelve el rango [inicio, fin) de la página elegida; con una sola página
+    # no se muestra ningún control
+    paginas = max(1, math.ceil(total / por_pagina))
+    if paginas == 1:
+        return 0, total
+    pagina = st.number_input(
+        f"Página (de {paginas}):", min_value=1, max_value=paginas, value=1, step=1, key=clave
+    )
+    inicio = (pagina - 1) * por_pagina
+    fin = min(inicio + por_pagina, total)
+    st.caption(f"Sesiones {inicio + 1}–{fin} de {total}")
+    return inicio, fin
+
+
+def tabla_paginada(df, clave, por_pagina=FILAS_POR_PAGINA, **opciones):
+    # st.dataframe con solo la página visible: al navegador no viaja la tabla
+    # completa del asesor
+    inicio, fin = paginar(len(df), clave, por_pagina)
+    st.dataframe(df.iloc[inicio:fin], **opciones)
+
+
+def descarga_tabla(df, nombre, clave):
+    # Botón para descargar df completo en el formato elegido. El archivo se
+    # genera por lotes y solo al pulsar el botón, en otro hilo, no en cada rerun
+    col_formato, col_boton = st.columns([1, 2])
+    formato = col_formato.radio("Formato:", list(FORMATOS), format_func=FORMATOS.get, horizontal=True, key=f"formato_{clave}")
+    col_boton.download_button(
+        f"⬇️ Descargar {len(df)} sesiones ({FORMATOS[formato]})",
+        data=lambda: exportar(df, formato),
+        file_name=f"{nombre}.{formato}",
+        mime=MIME[formato],
+        key=f"descarga_{clave}",
+        on_click='ignore'
+    )
+
+
+def texto_o_vacio(serie, vacio):
+    # Versión vectorizada del chequeo pd.isna(...) or valor.strip() == ""
+    texto = serie.astype('string')
+    en_blanco = (texto.isna() | (texto.str.strip() == '')).fillna(True)
+    return texto.where(~en_blanco, vacio).astype(str)
+
+
+def mostrar_lineas(lineas):
+    # Un solo elemento de markdown por página en lugar de uno por sesión
+    if len(lineas):
+        st.markdown("\n\n".join(lineas))
+
+
+def formatear_fecha(fechas, formato, desconocida="Fecha desconocida"):
+    return fechas.dt.strftime(formato).fillna(desconocida).astype(str)
+
+
+def valores_visibles(df, columnas, vacio="No disponible"):
+    # Equivalente vectorizado de mostrar_valor() aplicado a cada columna;
+    # las columnas que no existen en el Excel se muestran como vacías
+    return pd.DataFrame({
+        columna: texto_o_vacio(df[columna], vacio) if columna in df else pd.Series(vacio, index=df.index)
+        for columna in columnas
+    })
+
+
+def titulos_detalle(df):
+    # Encabezado de cada sesión en el detalle: fecha, evaluador y duración
+    valores = valores_visibles(df, ['Evaluador', 'Duración de Capa'])
+    fechas = formatear_fecha(df['Fecha de Capa'], '%d-%m-%Y')
+    return (
+        "Sesión del " + fechas + " - Evaluador: " + valores['Evaluador']
+        + " - Duración: " + valores['Duración de Capa'] + " min"
+    )
+
+
+def mostrar_detalle_sesiones(df, campos, clave, por_pagina=POR_PAGINA):
+    # Lista de sesiones en expanders, paginada: solo se arma el contenido de la
+    # página visible y cada expander lleva un único markdown.
+    # campos: lista de (etiqueta, columna) en el orden en que se muestran
+    inicio, fin = paginar(len(df), clave, por_pagina)
+    pagina = df.iloc[inicio:fin]
+    titulos = titulos_detalle(pagina)
+    valores = valores_visibles(pagina, [columna for _, columna in campos])
+    cuerpo = pd.Series("", index=pagina.index)
+    for etiqueta, columna in campos:
+        cuerpo = cuerpo + f"**{etiqueta}:** " + valores[columna] + "\n\n"
+    cuerpo = cuerpo + "---"
+    for titulo, texto in zip(titulos, cuerpo):
+        with st.expander(titulo):
+            st.markdown(texto)
+
+
+def metrica_tendencia(contenedor, etiqueta, ultima, unidad):
+    # ultima: resultado de TendenciasAsesores.ultima(); la pendiente va como
+    # delta (verde si sube, rojo si baja, gris si es estable)
+    contenedor.metric(
+        etiqueta,
+        ultima['estado'] or "Sin datos",
+        delta=f"{ultima['pendiente']:+.3f} {POR_UNIDAD[unidad]}" if ultima['estado'] else None,
+        delta_color='off' if ultima['estado'] == ESTADOS_TENDENCIA[0] else 'normal'
+    )